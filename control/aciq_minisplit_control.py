@@ -24,15 +24,20 @@ Version: 1.0
 import logging
 import time
 import json
-import hashlib
+import copy
 import os
-from datetime import datetime, timedelta
+import queue
+import uuid
 from enum import Enum
-from typing import Optional, Dict, Tuple
+from typing import Dict
 import threading
 
 logger = logging.getLogger(__name__)
 
+# Parsed config files keyed by (absolute path, mtime) - a rewrite of the
+# file changes its mtime, so stale entries are never returned
+_CONFIG_CACHE: Dict = {}
+
 # Control method detection
 MQTT_AVAILABLE = False
 try:
@@ -41,6 +46,13 @@ try:
 except ImportError:
     logger.warning("paho-mqtt not available - MQTT control disabled")
 
+# orjson parses the bytes payload directly; stdlib json accepts bytes too
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 HTTP_AVAILABLE = False
 try:
     import requests
@@ -49,6 +61,12 @@ except ImportError:
     logger.warning("requests not available - HTTP control disabled")
 
 
+def _tenths(temp_c: float) -> str:
+    """Format a positive temperature to one decimal via integer tenths"""
+    t_tenths = int(temp_c * 10 + 0.5)
+    return f"{t_tenths // 10}.{t_tenths % 10}"
+
+
 class ControlMethod(Enum):
     """Available control methods"""
     MQTT_LOCAL = "mqtt_local"
@@ -66,6 +84,10 @@ class MiniSplitMode(Enum):
     AUTO = "auto"
 
 
+# Value -> member lookup, avoids Enum's value scan on every message
+_MODE_BY_VALUE = {m.value: m for m in MiniSplitMode}
+
+
 class FanSpeed(Enum):
     """Fan speed settings"""
     AUTO = "auto"
@@ -102,11 +124,14 @@ class ACiQMiniSplitController:
         self.current_fan_speed = FanSpeed.AUTO
         self.actual_temp = None
         self.is_running = False
+        self.pending_setpoint = None  # (°F, mode) queued for the worker, not yet sent
+        self._confirmed_setpoints = {}  # ControlMethod -> (°F, mode) the unit last accepted
         
-        # Rate limiting
-        self.min_command_interval = 5  # seconds between commands
+        # Rate limiting (token bucket: bursts up to capacity, refills per second)
         self.max_commands_per_minute = 10
-        self.command_history = []
+        self._bucket = float(self.max_commands_per_minute)
+        self._last_refill = time.monotonic()
+        self._refill_rate = self.max_commands_per_minute / 60.0
         
         # Timeout protection
         self.command_timeout = 10  # seconds
@@ -114,9 +139,28 @@ class ACiQMiniSplitController:
         
         # Thread safety
         self.lock = threading.Lock()
+        self._connected_event = threading.Event()
+        
+        # Shared HTTP session so commands reuse a keep-alive connection
+        self._session = None
+        if HTTP_AVAILABLE:
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=4, max_retries=0
+            )
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+        
+        # Background worker for blocking HTTP/cloud commands
+        self._cmd_q = queue.Queue(maxsize=4)
+        self._worker = None
         
         # Initialize connection
         self._initialize_connection()
+        
+        if self.control_method in (ControlMethod.HTTP_LOCAL, ControlMethod.CLOUD_API):
+            self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._worker.start()
     
     def _load_config(self) -> Dict:
         """Load and decrypt configuration"""
@@ -126,6 +170,11 @@ class ACiQMiniSplitController:
                 logger.info("Creating default configuration...")
                 return self._create_default_config()
             
+            st = os.stat(self.config_file)
+            key = (os.path.abspath(self.config_file), st.st_mtime_ns)
+            if key in _CONFIG_CACHE:
+                return copy.deepcopy(_CONFIG_CACHE[key])
+            
             with open(self.config_file, 'r') as f:
                 config = json.load(f)
             
@@ -133,6 +182,11 @@ class ACiQMiniSplitController:
             if config.get('encrypted', False):
                 config = self._decrypt_config(config)
             
+            # Drop entries for older versions of this file before caching
+            for stale in [k for k in _CONFIG_CACHE if k[0] == key[0]]:
+                del _CONFIG_CACHE[stale]
+            _CONFIG_CACHE[key] = copy.deepcopy(config)
+            
             return config
         
         except Exception as e:
@@ -231,8 +285,13 @@ class ACiQMiniSplitController:
         
         mqtt_config = self.config['mqtt']
         
+        # Command topic and payload layout never change after init
+        self._command_topic = f"{mqtt_config['topic_prefix']}/{self.config['device_id']}/command"
+        self._payload_tmpl = '{{"temperature":{t},"mode":"{m}","fan_speed":"{f}","power":"on"}}'
+        
         try:
-            self.mqtt_client = mqtt.Client(client_id=f"cannabis_dryer_{int(time.time())}")
+            self._client_id = f"cd_{uuid.uuid4().hex[:10]}"
+            self.mqtt_client = mqtt.Client(client_id=self._client_id, clean_session=True)
             
             # Set username/password if provided
             if mqtt_config.get('username'):
@@ -259,8 +318,9 @@ class ACiQMiniSplitController:
             
             self.mqtt_client.loop_start()
             
-            # Wait for connection
-            time.sleep(2)
+            # Wait for on_connect to signal the CONNACK
+            if not self._connected_event.wait(timeout=self.connection_timeout):
+                raise Exception("MQTT connect timeout")
             
             if self.connected:
                 self.control_method = ControlMethod.MQTT_LOCAL
@@ -276,6 +336,7 @@ class ACiQMiniSplitController:
         """MQTT connection callback"""
         if rc == 0:
             self.connected = True
+            self._connected_event.set()
             logger.info("Connected to MQTT broker")
             
             # Subscribe to status topics
@@ -288,31 +349,59 @@ class ACiQMiniSplitController:
         else:
             logger.error(f"MQTT connection failed with code: {rc}")
             self.connected = False
+            # Wake the init path so it fails fast instead of timing out
+            self._connected_event.set()
     
     def _on_mqtt_disconnect(self, client, userdata, rc):
         """MQTT disconnection callback"""
         self.connected = False
+        self._connected_event.clear()
         if rc != 0:
             logger.warning(f"Unexpected MQTT disconnect (code: {rc})")
     
     def _on_mqtt_message(self, client, userdata, msg):
         """Handle incoming MQTT messages"""
         try:
-            payload = json.loads(msg.payload.decode())
-            logger.debug(f"MQTT message received: {payload}")
-            
-            # Update current state from device
-            if 'temperature' in payload:
-                self.actual_temp = payload['temperature']
-            if 'mode' in payload:
-                self.current_mode = MiniSplitMode(payload['mode'])
-            if 'running' in payload:
-                self.is_running = payload['running']
-        
-        except json.JSONDecodeError:
+            payload = _loads(msg.payload)
+        except ValueError:
             logger.warning(f"Invalid MQTT message: {msg.payload}")
-        except Exception as e:
-            logger.error(f"Error processing MQTT message: {e}")
+            return
+        
+        if not isinstance(payload, dict):
+            logger.warning(f"Unexpected MQTT message: {msg.payload}")
+            return
+        
+        logger.debug(f"MQTT message received: {payload}")
+        
+        # Update current state from device
+        temperature = payload.get('temperature')
+        if temperature is not None:
+            self.actual_temp = temperature
+        
+        mode = payload.get('mode')
+        mode_enum = None
+        if isinstance(mode, str):
+            mode_enum = _MODE_BY_VALUE.get(mode)
+            if mode_enum:
+                self.current_mode = mode_enum
+        
+        running = payload.get('running')
+        if running is not None:
+            self.is_running = running
+        
+        # Unit switched off or changed mode locally - resend the next setpoint
+        with self.lock:
+            confirmed = self._confirmed_setpoints.get(ControlMethod.MQTT_LOCAL)
+            if confirmed and (running is False or (mode_enum and mode_enum != confirmed[1])):
+                del self._confirmed_setpoints[ControlMethod.MQTT_LOCAL]
+    
+    def _command_body_template(self) -> str:
+        """JSON body template for HTTP/cloud commands with device_id filled in"""
+        device_id = json.dumps(self.config['device_id']).replace('{', '{{').replace('}', '}}')
+        return (
+            '{{"device_id":' + device_id +
+            ',"temperature":{t},"mode":"{m}","fan_speed":"{f}"}}'
+        )
     
     def _init_http_control(self):
         """Initialize HTTP local API control"""
@@ -321,12 +410,22 @@ class ACiQMiniSplitController:
         http_config = self.config['http']
         base_url = http_config['base_url']
         
+        # Request pieces that never change between commands
+        self._http_url = f"{base_url}/api/control"
+        self._http_headers = {
+            'Authorization': f"Bearer {http_config.get('api_key', '')}",
+            'Content-Type': 'application/json'
+        }
+        self._http_verify = http_config.get('verify_ssl', False)
+        self._http_body_tmpl = self._command_body_template()
+        
         try:
             # Test connection
-            response = requests.get(
+            response = self._session.get(
                 f"{base_url}/api/status",
+                headers=self._http_headers,
                 timeout=5,
-                verify=http_config.get('verify_ssl', False)
+                verify=self._http_verify
             )
             
             if response.status_code in [200, 401]:
@@ -346,9 +445,12 @@ class ACiQMiniSplitController:
         
         cloud_config = self.config['cloud']
         
+        self._cloud_url = f"{cloud_config['api_url']}/devices/control"
+        self._cloud_body_tmpl = self._command_body_template()
+        
         try:
             # Authenticate with cloud API
-            response = requests.post(
+            response = self._session.post(
                 f"{cloud_config['api_url']}/auth/login",
                 json={
                     'username': cloud_config['username'],
@@ -360,6 +462,7 @@ class ACiQMiniSplitController:
             if response.status_code == 200:
                 data = response.json()
                 self.cloud_token = data.get('token')
+                self._session.headers['Authorization'] = f"Bearer {self.cloud_token}"
                 self.connected = True
                 self.control_method = ControlMethod.CLOUD_API
                 logger.info("✓ Cloud API initialized")
@@ -371,36 +474,31 @@ class ACiQMiniSplitController:
             raise
     
     def _check_rate_limit(self) -> bool:
-        """Check if command is within rate limits"""
+        """Check if command is within rate limits (takes a token if so)"""
         with self.lock:
-            now = time.time()
-            
-            # Remove old commands from history (older than 1 minute)
-            self.command_history = [
-                t for t in self.command_history 
-                if now - t < 60
-            ]
+            now = time.monotonic()
             
-            # Check minute limit
-            if len(self.command_history) >= self.max_commands_per_minute:
-                logger.warning("Rate limit exceeded")
-                return False
+            # Refill tokens for the time elapsed since the last check
+            self._bucket = min(
+                float(self.max_commands_per_minute),
+                self._bucket + (now - self._last_refill) * self._refill_rate
+            )
+            self._last_refill = now
             
-            # Check minimum interval
-            if self.last_command_time:
-                time_since_last = now - self.last_command_time
-                if time_since_last < self.min_command_interval:
-                    logger.debug(f"Waiting {self.min_command_interval - time_since_last:.1f}s")
-                    return False
+            if self._bucket >= 1.0:
+                self._bucket -= 1.0
+                return True
             
-            return True
+            logger.warning("Rate limit exceeded")
+            return False
     
-    def _record_command(self):
-        """Record command for rate limiting"""
+    def _record_command(self, temp_f: float, mode: MiniSplitMode, method: ControlMethod):
+        """Record a setpoint the unit accepted over method"""
         with self.lock:
-            now = time.time()
-            self.command_history.append(now)
-            self.last_command_time = now
+            self.last_command_time = time.time()
+            self.current_temp_setpoint = temp_f
+            self.current_mode = mode
+            self._confirmed_setpoints[method] = (temp_f, mode)
     
     def set_temperature(self, temp_f: float, mode: str = 'cool') -> bool:
         """
@@ -411,7 +509,9 @@ class ACiQMiniSplitController:
             mode: Operating mode ('cool', 'heat', 'dry', 'fan', 'auto')
         
         Returns:
-            True if command sent successfully
+            True if the command was sent, or for HTTP/cloud queued for the
+            background worker (see pending_setpoint). The reported setpoint
+            only changes once the unit has accepted the command.
         """
         # Validate inputs
         limits = self.config['limits']
@@ -419,17 +519,26 @@ class ACiQMiniSplitController:
             logger.error(f"Temperature {temp_f}°F outside safe limits")
             return False
         
+        mode_enum = _MODE_BY_VALUE.get(mode.lower())
+        if mode_enum is None:
+            logger.error(f"Invalid mode: {mode}")
+            return False
+        
+        # Nothing to send if this control method already delivered (or has
+        # queued) the same setpoint
+        with self.lock:
+            targets = (self._confirmed_setpoints.get(self.control_method),
+                       self.pending_setpoint)
+        for target in targets:
+            if target and abs(temp_f - target[0]) < 0.05 and mode_enum == target[1]:
+                logger.debug("Setpoint unchanged, skipping")
+                return True
+        
         # Check rate limiting
         if not self._check_rate_limit():
             logger.warning("Command blocked by rate limiter")
             return False
         
-        try:
-            mode_enum = MiniSplitMode(mode.lower())
-        except ValueError:
-            logger.error(f"Invalid mode: {mode}")
-            return False
-        
         # Convert to Celsius for device
         temp_c = (temp_f - 32) * 5/9
         
@@ -440,10 +549,9 @@ class ACiQMiniSplitController:
         
         if self.control_method == ControlMethod.MQTT_LOCAL:
             success = self._mqtt_set_temperature(temp_c, mode_enum)
-        elif self.control_method == ControlMethod.HTTP_LOCAL:
-            success = self._http_set_temperature(temp_c, mode_enum)
-        elif self.control_method == ControlMethod.CLOUD_API:
-            success = self._cloud_set_temperature(temp_c, mode_enum)
+        elif self.control_method in (ControlMethod.HTTP_LOCAL, ControlMethod.CLOUD_API):
+            # Recorded by the worker once the command actually goes through
+            return self._enqueue_command(temp_f, temp_c, mode_enum, self.control_method)
         elif self.control_method == ControlMethod.IR_FALLBACK:
             success = self._ir_set_temperature(temp_f, mode_enum)
         else:
@@ -451,12 +559,55 @@ class ACiQMiniSplitController:
             return False
         
         if success:
-            self._record_command()
-            self.current_temp_setpoint = temp_f
-            self.current_mode = mode_enum
+            self._record_command(temp_f, mode_enum, self.control_method)
         
         return success
     
+    def _enqueue_command(self, temp_f: float, temp_c: float, mode: MiniSplitMode,
+                         method: ControlMethod) -> bool:
+        """Hand an HTTP/cloud command to the worker thread (last value wins)"""
+        # Drop any commands not yet sent - only the newest setpoint matters
+        try:
+            while True:
+                self._cmd_q.get_nowait()
+        except queue.Empty:
+            pass
+        
+        # Marked pending before the put so the worker can't clear it first
+        with self.lock:
+            self.pending_setpoint = (temp_f, mode)
+        try:
+            self._cmd_q.put_nowait((temp_f, temp_c, mode, method))
+            return True
+        except queue.Full:
+            with self.lock:
+                self.pending_setpoint = None
+            logger.error("Command queue full, dropping command")
+            return False
+    
+    def _worker_loop(self):
+        """Send queued HTTP/cloud commands off the control thread"""
+        while True:
+            item = self._cmd_q.get()
+            if item is None:
+                break
+            
+            temp_f, temp_c, mode, method = item
+            if method == ControlMethod.HTTP_LOCAL:
+                success = self._http_set_temperature(temp_c, mode)
+            else:
+                success = self._cloud_set_temperature(temp_c, mode)
+            
+            if success:
+                self._record_command(temp_f, mode, method)
+            else:
+                logger.warning(f"Queued {method.value} command failed ({temp_c:.1f}°C)")
+            
+            with self.lock:
+                # A newer command may have been queued while this one was sent
+                if self.pending_setpoint == (temp_f, mode):
+                    self.pending_setpoint = None
+    
     def _mqtt_set_temperature(self, temp_c: float, mode: MiniSplitMode) -> bool:
         """Send temperature command via MQTT"""
         if not self.connected:
@@ -464,23 +615,13 @@ class ACiQMiniSplitController:
             return False
         
         try:
-            device_id = self.config['device_id']
-            topic_prefix = self.config['mqtt']['topic_prefix']
-            
-            command_topic = f"{topic_prefix}/{device_id}/command"
-            
-            payload = {
-                'temperature': round(temp_c, 1),
-                'mode': mode.value,
-                'fan_speed': self.current_fan_speed.value,
-                'power': 'on'
-            }
+            payload = self._payload_tmpl.format(
+                t=_tenths(temp_c),
+                m=mode.value,
+                f=self.current_fan_speed.value
+            ).encode('ascii')
             
-            result = self.mqtt_client.publish(
-                command_topic,
-                json.dumps(payload),
-                qos=1
-            )
+            result = self.mqtt_client.publish(self._command_topic, payload, 1, False)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
                 logger.info("✓ MQTT command sent successfully")
@@ -495,20 +636,19 @@ class ACiQMiniSplitController:
     
     def _http_set_temperature(self, temp_c: float, mode: MiniSplitMode) -> bool:
         """Send temperature command via HTTP API"""
-        http_config = self.config['http']
-        
         try:
-            response = requests.post(
-                f"{http_config['base_url']}/api/control",
-                json={
-                    'device_id': self.config['device_id'],
-                    'temperature': round(temp_c, 1),
-                    'mode': mode.value,
-                    'fan_speed': self.current_fan_speed.value
-                },
-                headers={'Authorization': f"Bearer {http_config.get('api_key', '')}"},
+            body = self._http_body_tmpl.format(
+                t=_tenths(temp_c),
+                m=mode.value,
+                f=self.current_fan_speed.value
+            ).encode('ascii')
+            
+            response = self._session.post(
+                self._http_url,
+                data=body,
+                headers=self._http_headers,
                 timeout=self.command_timeout,
-                verify=http_config.get('verify_ssl', False)
+                verify=self._http_verify
             )
             
             if response.status_code == 200:
@@ -524,18 +664,17 @@ class ACiQMiniSplitController:
     
     def _cloud_set_temperature(self, temp_c: float, mode: MiniSplitMode) -> bool:
         """Send temperature command via cloud API"""
-        cloud_config = self.config['cloud']
-        
         try:
-            response = requests.post(
-                f"{cloud_config['api_url']}/devices/control",
-                json={
-                    'device_id': self.config['device_id'],
-                    'temperature': round(temp_c, 1),
-                    'mode': mode.value,
-                    'fan_speed': self.current_fan_speed.value
-                },
-                headers={'Authorization': f"Bearer {self.cloud_token}"},
+            body = self._cloud_body_tmpl.format(
+                t=_tenths(temp_c),
+                m=mode.value,
+                f=self.current_fan_speed.value
+            ).encode('ascii')
+            
+            response = self._session.post(
+                self._cloud_url,
+                data=body,
+                headers={'Content-Type': 'application/json'},
                 timeout=self.command_timeout
             )
             
@@ -568,10 +707,13 @@ class ACiQMiniSplitController:
         Returns:
             Dictionary with current state
         """
+        with self.lock:
+            pending = self.pending_setpoint
         return {
             'connected': self.connected,
             'control_method': self.control_method.value if self.control_method else None,
             'setpoint_f': self.current_temp_setpoint,
+            'pending_setpoint_f': pending[0] if pending else None,
             'actual_temp_f': self.actual_temp,
             'mode': self.current_mode.value,
             'fan_speed': self.current_fan_speed.value,
@@ -587,6 +729,14 @@ class ACiQMiniSplitController:
             self.mqtt_client.loop_stop()
             self.mqtt_client.disconnect()
         
+        if self._worker is not None:
+            self._cmd_q.put(None)
+            self._worker.join(timeout=self.command_timeout)
+            self._worker = None
+        
+        if self._session is not None:
+            self._session.close()
+        
         self.connected = False
         logger.info("Mini-split controller shutdown complete")
 
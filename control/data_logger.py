@@ -273,6 +273,7 @@ class DataLogger:
                 return
             
             timestamp = datetime.now()
+            readings = []
             
             # Log each sensor zone
             for zone_name, data in sensor_data.items():
@@ -298,7 +299,10 @@ class DataLogger:
                         water_activity=vpd_reading.estimated_water_activity
                     )
                     
-                    self._save_sensor_reading(reading)
+                    readings.append(reading)
+            
+            # All zones go in with one connection and one executemany
+            self._save_sensor_readings(readings)
             
         except Exception as e:
             logger.error(f"Failed to log sensor reading: {e}")
@@ -518,13 +522,19 @@ class DataLogger:
     
     def _save_sensor_reading(self, reading: SensorReading):
         """Save sensor reading to database"""
+        self._save_sensor_readings([reading])
+    
+    def _save_sensor_readings(self, readings: List[SensorReading]):
+        """Save a batch of sensor readings in one transaction"""
+        if not readings:
+            return
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
+            conn.executemany('''
                 INSERT INTO sensor_readings 
                 (timestamp, session_id, sensor_id, zone_name, temperature_f, 
                  humidity_percent, dew_point_f, vpd_kpa, water_activity)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            ''', [(
                 reading.timestamp.isoformat(),
                 reading.session_id,
                 reading.sensor_id,
@@ -534,7 +544,7 @@ class DataLogger:
                 reading.dew_point_f,
                 reading.vpd_kpa,
                 reading.water_activity
-            ))
+            ) for reading in readings])
     
     def _save_equipment_status(self, status: EquipmentStatus):
         """Save equipment status to database"""
@@ -6,6 +6,7 @@ This replaces SimulationMode when running on actual Pi hardware
 
 import time
 import logging
+import numpy as np
 import RPi.GPIO as GPIO
 import board
 import busio
@@ -13,6 +14,19 @@ import adafruit_ahtx0
 
 logger = logging.getLogger(__name__)
 
+# pigpio (optional) lets us switch every relay with one bank write
+PIGPIO_AVAILABLE = False
+try:
+    import pigpio
+    PIGPIO_AVAILABLE = True
+except ImportError:
+    logger.warning("pigpio not available - relays switched one pin at a time")
+
+# AHT20 raw protocol, used to overlap conversions across all sensors
+AHT_TRIGGER = bytes([0xAC, 0x33, 0x00])  # Trigger measurement command
+AHT_CONVERSION_TIME = 0.08              # Seconds per measurement
+AHT_STATUS_BUSY = 0x80
+
 class GPIOController:
     """Controls relays via GPIO pins"""
     
@@ -35,7 +49,17 @@ class GPIOController:
         for device, pin in self.pins.items():
             GPIO.setup(pin, GPIO.OUT)
             GPIO.output(pin, GPIO.HIGH)  # Start with everything OFF
-            logger.info(f"GPIO {pin} configured for {device}")
+            logger.info("GPIO %d configured for %s", pin, device)
+        
+        # Per-device bit in GPIO bank 1 for batched writes
+        self._bits = {device: 1 << pin for device, pin in self.pins.items()}
+        self._pi = None
+        if PIGPIO_AVAILABLE:
+            pi = pigpio.pi()
+            if pi.connected:
+                self._pi = pi
+            else:
+                logger.warning("pigpio daemon not running - relays switched one pin at a time")
     
     def set_device(self, device, state):
         """Control a device via GPIO relay
@@ -52,12 +76,45 @@ class GPIOController:
         gpio_state = GPIO.LOW if state == 'ON' else GPIO.HIGH
         
         GPIO.output(pin, gpio_state)
-        logger.info(f"{device} set to {state} (GPIO {pin} = {gpio_state})")
+        logger.info("%s set to %s (GPIO %d = %s)", device, state, pin, gpio_state)
+        return True
+    
+    def set_all(self, states):
+        """Set several relays at once
+        Args:
+            states: Dict of device name -> 'ON' or 'OFF'
+        """
+        mask = 0
+        on_bits = 0
+        for device, state in states.items():
+            bit = self._bits.get(device)
+            if bit is None:
+                logger.error(f"Unknown device: {device}")
+                continue
+            mask |= bit
+            if state == 'ON':
+                on_bits |= bit
+        
+        if self._pi is not None:
+            # Active LOW relays: set (HIGH) the OFF pins, clear (LOW) the ON pins
+            off_bits = mask & ~on_bits
+            if off_bits:
+                self._pi.set_bank_1(off_bits)
+            if on_bits:
+                self._pi.clear_bank_1(on_bits)
+        else:
+            for device, bit in self._bits.items():
+                if mask & bit:
+                    GPIO.output(self.pins[device], GPIO.LOW if on_bits & bit else GPIO.HIGH)
+        
+        logger.debug("Relays set: %s", states)
         return True
     
     def cleanup(self):
         """Clean up GPIO on exit"""
         logger.info("Cleaning up GPIO")
+        if self._pi is not None:
+            self._pi.stop()
         GPIO.cleanup()
 
 
@@ -113,9 +170,50 @@ class I2CSensorReader:
             return None, None
     
     def read_all_sensors(self):
-        """Read all sensors and return dict of readings"""
+        """Read all sensors and return dict of readings
+        
+        Triggers every sensor first, waits one conversion time, then reads
+        all results, so the conversions overlap instead of running back to
+        back. Sensors that fail or are still busy fall back to the driver.
+        """
         readings = {}
-        for sensor_id in self.sensors.keys():
+        fallback = []
+        buf = bytearray(7)
+        
+        while not self.i2c.try_lock():
+            pass
+        try:
+            triggered = []
+            for sensor_id in self.sensors:
+                try:
+                    self.i2c.writeto(self.sensor_addresses[sensor_id], AHT_TRIGGER)
+                    triggered.append(sensor_id)
+                except OSError:
+                    fallback.append(sensor_id)
+            
+            time.sleep(AHT_CONVERSION_TIME)
+            
+            for sensor_id in triggered:
+                try:
+                    self.i2c.readfrom_into(self.sensor_addresses[sensor_id], buf)
+                except OSError:
+                    fallback.append(sensor_id)
+                    continue
+                
+                if buf[0] & AHT_STATUS_BUSY:
+                    fallback.append(sensor_id)
+                    continue
+                
+                humidity = ((buf[1] << 12) | (buf[2] << 4) | (buf[3] >> 4)) * 100 / 1048576
+                temp_c = (((buf[3] & 0x0F) << 16) | (buf[4] << 8) | buf[5]) * 200 / 1048576 - 50
+                readings[sensor_id] = {
+                    'temperature': (temp_c * 9/5) + 32,
+                    'humidity': humidity
+                }
+        finally:
+            self.i2c.unlock()
+        
+        for sensor_id in fallback:
             temp, humidity = self.read_sensor(sensor_id)
             if temp is not None:
                 readings[sensor_id] = {
@@ -163,18 +261,19 @@ class HardwareInterface:
     def update_sensors(self):
         """Read all sensors and update controller"""
         readings = self.sensors.read_all_sensors()
+        if not readings:
+            return
         
-        for sensor_id, data in readings.items():
-            self.controller.update_sensor_reading(
-                sensor_id,
-                data['temperature'],
-                data['humidity']
-            )
+        sensor_ids = list(readings)
+        temperatures = np.asarray([d['temperature'] for d in readings.values()])
+        humidities = np.asarray([d['humidity'] for d in readings.values()])
+        self.controller.update_sensor_readings_batch(sensor_ids, temperatures, humidities)
     
     def update_equipment(self):
         """Update physical equipment based on controller states"""
         from software.control.vpd_controller import EquipmentState
         
+        relay_states = {}
         for device, state in self.controller.equipment_states.items():
             if device == 'mini_split':
                 # Handle mini-split via IR
@@ -184,7 +283,10 @@ class HardwareInterface:
                 continue
             elif device in self.gpio.pins:
                 # Handle GPIO-controlled devices
-                self.gpio.set_device(device, state.value)
+                relay_states[device] = state.value
+        
+        # Switch all relays together
+        self.gpio.set_all(relay_states)
     
     def run(self):
         """Main hardware control loop"""
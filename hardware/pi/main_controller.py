@@ -5,15 +5,27 @@ Main control module for 40' shipping container cannabis dryer
 Uses VPD (Vapor Pressure Deficit) control to mimic Cannatrol's technology
 """
 
+# eventlet must patch the standard library before anything else imports it
+try:
+    import eventlet
+    eventlet.monkey_patch()
+    ASYNC_MODE = 'eventlet'
+except ImportError:
+    ASYNC_MODE = 'threading'
+
+import math
+import os
 import time
 import json
 import logging
+import queue
 import threading
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import RPi.GPIO as GPIO
 import board
 import adafruit_sht4x
@@ -24,6 +36,24 @@ import paho.mqtt.client as mqtt
 import redis
 import sqlite3
 
+# SocketIO serializes every emit; orjson is much faster than stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba is optional - without it the kernels below run as plain Python
+NUMBA_AVAILABLE = False
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # ============================================================================
 # CONFIGURATION AND CONSTANTS
 # ============================================================================
@@ -41,6 +71,10 @@ GPIO_PINS = {
     'SPARE_2': 21,           # IN8 - Future use
 }
 
+# Loads with real inrush current; staged_startup spaces these out while
+# switching everything else in one write
+HIGH_INRUSH_EQUIPMENT = frozenset({'DEHUMIDIFIER', 'ERV'})
+
 # Active LOW relay logic (fail-safe: if Pi crashes, all relays turn OFF)
 RELAY_ON = GPIO.LOW
 RELAY_OFF = GPIO.HIGH
@@ -52,6 +86,10 @@ I2C_PINS = {
     'SCL': 3,  # GPIO 3 (Physical Pin 5)
 }
 
+# SHT4x raw command set (used to overlap conversions across sensors)
+SHT4X_MEASURE_HIGH_PRECISION = bytes([0xFD])
+SHT4X_CONVERSION_TIME = 0.01  # Seconds (8.3 ms max for high precision)
+
 # Sensor I2C addresses (unique addresses for each sensor)
 SENSOR_CONFIG = {
     'dry_zone_1': {'address': 0x44, 'cable_length': '20ft', 'location': 'Front left'},
@@ -78,6 +116,11 @@ VPD_TARGETS = {
     }
 }
 
+# VPD_TARGETS flattened into tuples indexed by process day (capped at the
+# last listed day); missing days use the same defaults as the dict lookup
+_DRY_TARGETS = tuple(VPD_TARGETS['DRYING'].get(f'day_{d}', 1.0) for d in range(5))
+_CURE_TARGETS = tuple(VPD_TARGETS['CURING'].get(f'day_{d}', 0.6) for d in range(9))
+
 # Target water activity levels
 WATER_ACTIVITY_TARGETS = {
     'initial': 0.65,
@@ -92,8 +135,59 @@ CONTROL_DEADBAND = {
     'rh': 2.0,     # %
 }
 
+# Control loop period in seconds
+CONTROL_INTERVAL = 5.0
+
+# MQTT telemetry (retained, one topic per metric)
+MQTT_BROKER = 'localhost'
+MQTT_PORT = 1883
+MQTT_TOPIC_PREFIX = 'cannabis'
+
+# Saturation vapor pressure lookup (Tetens, kPa) at 0.1 °C steps over 0-50 °C.
+# Held as a plain list so per-sensor interpolation never touches NumPy scalars.
+_SVP_TMIN = 0.0
+_SVP_TMAX = 50.0
+_SVP_INV_DX = 10.0
+_SVP_T = np.linspace(_SVP_TMIN, _SVP_TMAX, int((_SVP_TMAX - _SVP_TMIN) * _SVP_INV_DX) + 1)
+_SVP_TABLE = (0.61078 * np.exp((17.269 * _SVP_T) / (237.3 + _SVP_T))).tolist()
+
 # Security configuration
-ENCRYPTION_KEY = Fernet.generate_key()
+ENCRYPTION_KEY_PATH = '/etc/cannabis_dryer/fernet.key'
+
+def load_or_create_key(path: str = ENCRYPTION_KEY_PATH) -> bytes:
+    """Load the Fernet key from disk, creating it (mode 600) on first run
+    
+    Keeping the key across restarts means anything encrypted by a previous
+    run (e.g. cached state in Redis) can still be decrypted.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Present but unreadable, e.g. a root-owned 0600 key under a service user
+        logging.warning(f"Could not read encryption key {path}: {e} - using a temporary key")
+        return Fernet.generate_key()
+    
+    key = Fernet.generate_key()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+    except FileExistsError:
+        # Another process created it first - use theirs
+        try:
+            with open(path, 'rb') as f:
+                return f.read().strip()
+        except OSError as e:
+            logging.warning(f"Could not read encryption key {path}: {e} - using a temporary key")
+    except OSError as e:
+        logging.warning(f"Could not persist encryption key to {path}: {e}")
+    return key
+
+ENCRYPTION_KEY = load_or_create_key()
 cipher_suite = Fernet(ENCRYPTION_KEY)
 
 # ============================================================================
@@ -112,7 +206,7 @@ class ProcessPhase(Enum):
     CURING = "curing"
     COMPLETE = "complete"
 
-@dataclass
+@dataclass(slots=True)
 class SensorReading:
     """Individual sensor reading data"""
     location: str
@@ -121,16 +215,16 @@ class SensorReading:
     vpd_kpa: float
     dew_point_c: float
     timestamp: datetime
+    # Fahrenheit values derived once at construction (and by build_reading
+    # when a pooled reading is refilled)
+    temperature_f: float = field(init=False)
+    dew_point_f: float = field(init=False)
     
-    @property
-    def temperature_f(self) -> float:
-        return (self.temperature_c * 9/5) + 32
-    
-    @property
-    def dew_point_f(self) -> float:
-        return (self.dew_point_c * 9/5) + 32
+    def __post_init__(self):
+        self.temperature_f = (self.temperature_c * 9/5) + 32
+        self.dew_point_f = (self.dew_point_c * 9/5) + 32
 
-@dataclass
+@dataclass(slots=True)
 class SystemState:
     """Complete system state"""
     phase: ProcessPhase
@@ -146,21 +240,54 @@ class SystemState:
 # SENSOR MANAGEMENT
 # ============================================================================
 
+@njit(cache=True, fastmath=True)
+def _svp_kpa(temp_c):
+    """Saturation vapor pressure (Tetens formula) in kPa"""
+    return 0.61078 * math.exp((17.269 * temp_c) / (237.3 + temp_c))
+
+@njit(cache=True, fastmath=True)
+def _dew_point_c(temp_c, rh):
+    """Magnus dew point in °C"""
+    a = 17.271
+    b = 237.7
+    gamma = (a * temp_c / (b + temp_c)) + math.log(rh / 100)
+    return (b * gamma) / (a - gamma)
+
+def _sht4x_crc8(data: bytes) -> int:
+    """Sensirion CRC-8 (poly 0x31, init 0xFF) over one 16-bit word"""
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
 class SensorManager:
     """Manages all temperature/humidity sensors on SparkFun Qwiic bus"""
     
     def __init__(self):
         self.sensors = {}
+        self.i2c = board.I2C()  # Uses pins 3 (SDA) and 5 (SCL)
+        # Compile the numba kernels now rather than on the first control step
+        _svp_kpa(20.0)
+        _dew_point_c(20.0, 50.0)
         self.initialize_sensors()
+        # Two reusable readings per sensor, alternated each read_all_sensors
+        # call, so the previous cycle's readings stay intact for anyone still
+        # serializing the last SystemState while the next cycle is filled in
+        self._reading_pool = {
+            location: [SensorReading(location, 0.0, 0.0, 0.0, 0.0, datetime.min)
+                       for _ in range(2)]
+            for location in self.sensors
+        }
+        self._pool_side = 0
         
     def initialize_sensors(self):
         """Initialize all sensors with unique I2C addresses"""
-        i2c = board.I2C()  # Uses pins 3 (SDA) and 5 (SCL)
-        
         for location, config in SENSOR_CONFIG.items():
             try:
                 # Initialize SHT4x sensor at specific address
-                sensor = adafruit_sht4x.SHT4x(i2c, address=config['address'])
+                sensor = adafruit_sht4x.SHT4x(self.i2c, address=config['address'])
                 sensor.mode = adafruit_sht4x.Mode.NOHEAT_HIGHPRECISION
                 
                 self.sensors[location] = {
@@ -168,7 +295,7 @@ class SensorManager:
                     'config': config
                 }
                 
-                logging.info(f"Initialized sensor at {location} (0x{config['address']:02X})")
+                logging.info("Initialized sensor at %s (0x%02X)", location, config['address'])
                 
             except Exception as e:
                 logging.error(f"Failed to initialize sensor at {location}: {e}")
@@ -183,39 +310,97 @@ class SensorManager:
             sensor_info = self.sensors[location]
             sensor = sensor_info['sensor']
             
-            # Read sensor with retry logic for long cable runs
+            # One conversion returns both values; a NAK on long cable runs
+            # raises immediately, so retry without sleeping
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    temperature_c = sensor.temperature
-                    humidity = sensor.relative_humidity
+                    temperature_c, humidity = sensor.measurements
                     break
                 except Exception as e:
                     if attempt == max_retries - 1:
                         raise e
-                    time.sleep(0.1)
-            
-            # Calculate VPD and dew point
-            vpd_kpa = self.calculate_vpd(temperature_c, humidity)
-            dew_point_c = self.calculate_dew_point(temperature_c, humidity)
             
-            return SensorReading(
-                location=location,
-                temperature_c=temperature_c,
-                humidity=humidity,
-                vpd_kpa=vpd_kpa,
-                dew_point_c=dew_point_c,
-                timestamp=datetime.now()
-            )
+            return self.build_reading(location, temperature_c, humidity)
             
         except Exception as e:
             logging.error(f"Error reading sensor at {location}: {e}")
             return None
     
+    def build_reading(self, location: str, temperature_c: float, humidity: float,
+                      timestamp: Optional[datetime] = None,
+                      into: Optional[SensorReading] = None) -> SensorReading:
+        """Build a SensorReading with derived VPD and dew point
+        
+        When ``into`` is given its fields are overwritten and it is returned
+        instead of allocating a new reading.
+        """
+        if into is not None:
+            into.location = location
+            into.temperature_c = temperature_c
+            into.humidity = humidity
+            into.vpd_kpa = self.calculate_vpd(temperature_c, humidity)
+            into.dew_point_c = self.calculate_dew_point(temperature_c, humidity)
+            into.timestamp = timestamp or datetime.now()
+            into.temperature_f = (temperature_c * 9/5) + 32
+            into.dew_point_f = (into.dew_point_c * 9/5) + 32
+            return into
+        return SensorReading(
+            location=location,
+            temperature_c=temperature_c,
+            humidity=humidity,
+            vpd_kpa=self.calculate_vpd(temperature_c, humidity),
+            dew_point_c=self.calculate_dew_point(temperature_c, humidity),
+            timestamp=timestamp or datetime.now()
+        )
+    
     def read_all_sensors(self) -> List[SensorReading]:
-        """Read all sensors"""
+        """Read all sensors
+        
+        Sends the measurement command to every sensor, waits one conversion
+        time, then reads all results, so the conversions overlap instead of
+        running back to back. Sensors that fail fall back to read_sensor.
+        """
         readings = []
-        for location in self.sensors.keys():
+        fallback = []
+        buf = bytearray(6)
+        self._pool_side ^= 1
+        side = self._pool_side
+        
+        while not self.i2c.try_lock():
+            pass
+        try:
+            triggered = []
+            for location, sensor_info in self.sensors.items():
+                try:
+                    self.i2c.writeto(sensor_info['config']['address'], SHT4X_MEASURE_HIGH_PRECISION)
+                    triggered.append(location)
+                except OSError:
+                    fallback.append(location)
+            
+            time.sleep(SHT4X_CONVERSION_TIME)
+            
+            now = datetime.now()
+            for location in triggered:
+                try:
+                    self.i2c.readfrom_into(self.sensors[location]['config']['address'], buf)
+                except OSError:
+                    fallback.append(location)
+                    continue
+                
+                if _sht4x_crc8(buf[0:2]) != buf[2] or _sht4x_crc8(buf[3:5]) != buf[5]:
+                    fallback.append(location)
+                    continue
+                
+                temperature_c = -45 + 175 * ((buf[0] << 8) | buf[1]) / 65535
+                humidity = -6 + 125 * ((buf[3] << 8) | buf[4]) / 65535
+                humidity = min(max(humidity, 0.0), 100.0)
+                readings.append(self.build_reading(location, temperature_c, humidity, now,
+                                                   into=self._reading_pool[location][side]))
+        finally:
+            self.i2c.unlock()
+        
+        for location in fallback:
             reading = self.read_sensor(location)
             if reading:
                 readings.append(reading)
@@ -224,8 +409,14 @@ class SensorManager:
     @staticmethod
     def calculate_vpd(temp_c: float, rh: float) -> float:
         """Calculate Vapor Pressure Deficit in kPa"""
-        # Saturation vapor pressure (Tetens formula)
-        svp = 0.61078 * np.exp((17.269 * temp_c) / (237.3 + temp_c))
+        # Saturation vapor pressure (Tetens formula), interpolated from the table
+        if _SVP_TMIN <= temp_c < _SVP_TMAX:
+            x = (temp_c - _SVP_TMIN) * _SVP_INV_DX
+            i = int(x)
+            lo = _SVP_TABLE[i]
+            svp = lo + (x - i) * (_SVP_TABLE[i + 1] - lo)
+        else:
+            svp = _svp_kpa(temp_c)
         # Actual vapor pressure
         avp = svp * (rh / 100)
         # VPD in kPa
@@ -235,11 +426,7 @@ class SensorManager:
     @staticmethod
     def calculate_dew_point(temp_c: float, rh: float) -> float:
         """Calculate dew point temperature"""
-        a = 17.271
-        b = 237.7
-        gamma = (a * temp_c / (b + temp_c)) + np.log(rh / 100)
-        dew_point = (b * gamma) / (a - gamma)
-        return dew_point
+        return _dew_point_c(float(temp_c), float(rh))
 
 # ============================================================================
 # EQUIPMENT CONTROL
@@ -258,8 +445,14 @@ class EquipmentController:
             'SUPPLY_FAN': EquipmentState.ON,
             'RETURN_FAN': EquipmentState.ON,
         }
+        # One bit per relay in GPIO_PINS order; set while the relay is ON
+        self._bit = {name: 1 << i for i, name in enumerate(GPIO_PINS)}
+        self._active_mask = 0
+        for equipment, state in self.equipment_states.items():
+            if state == EquipmentState.ON:
+                self._active_mask |= self._bit[equipment]
         self.last_state_change = {}
-        self.min_cycle_time = timedelta(minutes=5)  # Prevent short cycling
+        self.min_cycle_time = 300.0  # Seconds, prevent short cycling
         self.max_simultaneous_relays = 6  # Safety limit for current draw
         self.relay_startup_delay = 0.5  # Seconds between relay activations
         
@@ -271,18 +464,14 @@ class EquipmentController:
         for name, pin in GPIO_PINS.items():
             GPIO.setup(pin, GPIO.OUT)
             GPIO.output(pin, RELAY_OFF)  # Start with everything OFF (HIGH = OFF)
-            logging.info(f"Initialized {name} on GPIO {pin} (OFF)")
+            logging.info("Initialized %s on GPIO %d (OFF)", name, pin)
     
     def count_active_relays(self) -> int:
         """Count how many relays are currently ON"""
-        count = 0
-        for equipment, state in self.equipment_states.items():
-            if state == EquipmentState.ON and equipment in GPIO_PINS:
-                count += 1
-        return count
+        return self._active_mask.bit_count()
                 
-    def set_equipment_state(self, equipment: str, state: EquipmentState) -> bool:
-        """Set equipment state with short-cycle protection and Active LOW logic"""
+    def _can_switch(self, equipment: str, state: EquipmentState) -> bool:
+        """Check the relay limit and short-cycle protection for a change"""
         if equipment not in GPIO_PINS:
             logging.error(f"Unknown equipment: {equipment}")
             return False
@@ -294,12 +483,30 @@ class EquipmentController:
                 logging.warning(f"Maximum simultaneous relays ({self.max_simultaneous_relays}) reached. Cannot activate {equipment}")
                 return False
             
-        # Check for short cycling
+        # Check for short cycling (monotonic seconds)
         if equipment in self.last_state_change:
-            time_since_change = datetime.now() - self.last_state_change[equipment]
+            time_since_change = time.monotonic() - self.last_state_change[equipment]
             if time_since_change < self.min_cycle_time:
                 logging.warning(f"Preventing short cycle for {equipment}")
                 return False
+        return True
+    
+    def _record_state(self, equipment: str, state: EquipmentState):
+        """Record a state change that has been written to the relay"""
+        self.equipment_states[equipment] = state
+        if state == EquipmentState.ON:
+            self._active_mask |= self._bit[equipment]
+        else:
+            self._active_mask &= ~self._bit[equipment]
+        self.last_state_change[equipment] = time.monotonic()
+        
+        logging.info("%s state changed to %s (GPIO %d = %s)", equipment, state.name,
+                     GPIO_PINS[equipment], 'LOW' if state == EquipmentState.ON else 'HIGH')
+    
+    def set_equipment_state(self, equipment: str, state: EquipmentState) -> bool:
+        """Set equipment state with short-cycle protection and Active LOW logic"""
+        if not self._can_switch(equipment, state):
+            return False
         
         pin = GPIO_PINS[equipment]
         
@@ -316,31 +523,48 @@ class EquipmentController:
             # IDLE state - equipment is powered but not actively running
             GPIO.output(pin, RELAY_OFF)  # HIGH
             
-        self.equipment_states[equipment] = state
-        self.last_state_change[equipment] = datetime.now()
-        
-        logging.info(f"{equipment} state changed to {state.name} (GPIO {pin} = {'LOW' if state == EquipmentState.ON else 'HIGH'})")
+        self._record_state(equipment, state)
         return True
     
     def staged_startup(self, equipment_list: List[str]):
-        """Start multiple equipment with delays to prevent current surge"""
+        """Start multiple equipment, spacing out only high-inrush loads
+        
+        Low-surge loads (fans, solenoids) are switched together in a single
+        GPIO write; each high-inrush load then starts on its own after the
+        relay startup delay.
+        """
+        batch = []
         for equipment in equipment_list:
-            self.set_equipment_state(equipment, EquipmentState.ON)
-            time.sleep(self.relay_startup_delay)
+            if equipment in HIGH_INRUSH_EQUIPMENT:
+                continue
+            if self._can_switch(equipment, EquipmentState.ON):
+                # Record as we go so the relay limit counts earlier entries
+                self._record_state(equipment, EquipmentState.ON)
+                batch.append(GPIO_PINS[equipment])
+        if batch:
+            GPIO.output(batch, [RELAY_ON] * len(batch))
+        
+        for equipment in equipment_list:
+            if equipment in HIGH_INRUSH_EQUIPMENT:
+                self.set_equipment_state(equipment, EquipmentState.ON)
     
     def emergency_stop(self):
         """Emergency stop - turn off all equipment (set all pins HIGH)"""
         logging.critical("EMERGENCY STOP ACTIVATED")
-        for equipment in self.equipment_states.keys():
-            if equipment in GPIO_PINS:
-                GPIO.output(GPIO_PINS[equipment], RELAY_OFF)  # HIGH = OFF
-                self.equipment_states[equipment] = EquipmentState.OFF
+        output, off, states = GPIO.output, RELAY_OFF, self.equipment_states
+        for equipment in states:
+            pin = GPIO_PINS.get(equipment)
+            if pin is not None:
+                output(pin, off)  # HIGH = OFF
+                states[equipment] = EquipmentState.OFF
+        self._active_mask = 0
     
     def cleanup(self):
         """Clean up GPIO on shutdown - set all pins HIGH (OFF) for safety"""
         logging.info("Cleaning up GPIO - setting all relays to OFF")
+        output, off = GPIO.output, RELAY_OFF
         for pin in GPIO_PINS.values():
-            GPIO.output(pin, RELAY_OFF)  # HIGH = OFF
+            output(pin, off)  # HIGH = OFF
         GPIO.cleanup()
 
 # ============================================================================
@@ -355,25 +579,40 @@ class VPDController:
         self.equipment_controller = equipment_controller
         self.current_phase = ProcessPhase.IDLE
         self.process_start_time = None
+        self._process_start_mono = 0.0
         self.current_day = 0
         self.target_vpd = 0.8
+        # Most recent control_step result, published by the control loop
+        self.last_state: Optional[SystemState] = None
+        self.state_lock = threading.Lock()
         
     def get_current_target_vpd(self) -> float:
         """Get target VPD based on current phase and day"""
         if self.current_phase == ProcessPhase.DRYING:
-            day_key = f'day_{min(self.current_day, 4)}'
-            return VPD_TARGETS['DRYING'].get(day_key, 1.0)
+            return _DRY_TARGETS[min(self.current_day, 4)]
         elif self.current_phase == ProcessPhase.CURING:
-            day_key = f'day_{min(self.current_day, 8)}'
-            return VPD_TARGETS['CURING'].get(day_key, 0.6)
+            return _CURE_TARGETS[min(self.current_day, 8)]
         return 0.8
     
     def calculate_average_vpd(self, readings: List[SensorReading]) -> float:
         """Calculate average VPD from drying room sensors only"""
-        dry_room_readings = [r for r in readings if 'dry_zone' in r.location]
-        if not dry_room_readings:
-            return 0.0
-        return np.mean([r.vpd_kpa for r in dry_room_readings])
+        stats = self._dry_zone_stats(readings)
+        return stats[0] if stats else 0.0
+    
+    @staticmethod
+    def _dry_zone_stats(readings: List[SensorReading]) -> Optional[Tuple[float, float]]:
+        """Average (VPD, humidity) over drying room sensors in one pass"""
+        n = 0
+        vpd_sum = 0.0
+        rh_sum = 0.0
+        for r in readings:
+            if r.location.startswith('dry_zone'):
+                vpd_sum += r.vpd_kpa
+                rh_sum += r.humidity
+                n += 1
+        if n == 0:
+            return None
+        return vpd_sum / n, rh_sum / n
     
     def control_step(self) -> SystemState:
         """Execute one control step"""
@@ -385,7 +624,8 @@ class VPDController:
             return None
         
         # Calculate average VPD
-        current_vpd = self.calculate_average_vpd(readings)
+        dry_stats = self._dry_zone_stats(readings)
+        current_vpd = dry_stats[0] if dry_stats else 0.0
         
         # Update target VPD
         self.target_vpd = self.get_current_target_vpd()
@@ -412,11 +652,12 @@ class VPDController:
             self.equipment_controller.set_equipment_state('DEHUMIDIFIER', EquipmentState.IDLE)
         
         # ERV control based on air quality (simplified)
-        avg_humidity = np.mean([r.humidity for r in readings if 'dry_zone' in r.location])
-        if avg_humidity > 65:
-            self.equipment_controller.set_equipment_state('ERV', EquipmentState.ON)
-        elif avg_humidity < 55:
-            self.equipment_controller.set_equipment_state('ERV', EquipmentState.OFF)
+        if dry_stats:
+            avg_humidity = dry_stats[1]
+            if avg_humidity > 65:
+                self.equipment_controller.set_equipment_state('ERV', EquipmentState.ON)
+            elif avg_humidity < 55:
+                self.equipment_controller.set_equipment_state('ERV', EquipmentState.OFF)
         
         # Fans should always be running during active process
         if self.current_phase != ProcessPhase.IDLE:
@@ -438,18 +679,30 @@ class VPDController:
     def check_alarms(self, readings: List[SensorReading]) -> List[str]:
         """Check for alarm conditions"""
         alarms = []
+        n = len(readings)
+        if n == 0:
+            return alarms
+        
+        # Compare all sensors at once; only flagged readings build messages
+        temps_f = np.fromiter((r.temperature_f for r in readings), dtype=np.float64, count=n)
+        hums = np.fromiter((r.humidity for r in readings), dtype=np.float64, count=n)
+        high_t = temps_f > 75
+        low_t = temps_f < 55
+        high_h = hums > 70
+        low_h = hums < 40
         
-        for reading in readings:
+        for i in np.flatnonzero(high_t | low_t | high_h | low_h).tolist():
+            reading = readings[i]
             # Temperature alarms
-            if reading.temperature_f > 75:
+            if high_t[i]:
                 alarms.append(f"High temperature at {reading.location}: {reading.temperature_f:.1f}°F")
-            elif reading.temperature_f < 55:
+            elif low_t[i]:
                 alarms.append(f"Low temperature at {reading.location}: {reading.temperature_f:.1f}°F")
             
             # Humidity alarms
-            if reading.humidity > 70:
+            if high_h[i]:
                 alarms.append(f"High humidity at {reading.location}: {reading.humidity:.1f}%")
-            elif reading.humidity < 40:
+            elif low_h[i]:
                 alarms.append(f"Low humidity at {reading.location}: {reading.humidity:.1f}%")
         
         return alarms
@@ -458,14 +711,15 @@ class VPDController:
         """Start a new drying/curing process"""
         self.current_phase = phase
         self.process_start_time = datetime.now()
+        self._process_start_mono = time.monotonic()
         self.current_day = 1
         logging.info(f"Started {phase.value} process")
     
     def update_process_day(self):
         """Update the current process day based on elapsed time"""
         if self.process_start_time:
-            elapsed = datetime.now() - self.process_start_time
-            self.current_day = elapsed.days + 1
+            elapsed = time.monotonic() - self._process_start_mono
+            self.current_day = int(elapsed // 86400) + 1
             
             # Check for phase transition
             if self.current_phase == ProcessPhase.DRYING and self.current_day > 4:
@@ -484,101 +738,114 @@ class DataLogger:
     
     def __init__(self, db_path: str = '/home/mikejames/cannabis_dryer.db'):
         self.db_path = db_path
+        # One connection for the life of the process; statements autocommit
+        # unless wrapped in an explicit BEGIN/COMMIT
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.lock = threading.Lock()
         self.init_database()
         
     def init_database(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create tables
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sensor_readings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                location TEXT,
-                temperature_f REAL,
-                humidity REAL,
-                vpd_kpa REAL,
-                dew_point_f REAL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS equipment_states (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                equipment TEXT,
-                state TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS system_states (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                phase TEXT,
-                day INTEGER,
-                target_vpd REAL,
-                current_vpd REAL,
-                alarms TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self.lock:
+            cursor = self.conn.cursor()
+            
+            # Create tables
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sensor_readings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    location TEXT,
+                    temperature_f REAL,
+                    humidity REAL,
+                    vpd_kpa REAL,
+                    dew_point_f REAL
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS equipment_states (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    equipment TEXT,
+                    state TEXT
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS system_states (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    phase TEXT,
+                    day INTEGER,
+                    target_vpd REAL,
+                    current_vpd REAL,
+                    alarms TEXT
+                )
+            ''')
     
-    def log_sensor_reading(self, reading: SensorReading):
-        """Log sensor reading to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO sensor_readings 
-            (location, temperature_f, humidity, vpd_kpa, dew_point_f)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
+    @staticmethod
+    def _sensor_row(reading: SensorReading) -> tuple:
+        return (
             reading.location,
             reading.temperature_f,
             reading.humidity,
             reading.vpd_kpa,
             reading.dew_point_f
-        ))
-        
-        conn.commit()
-        conn.close()
+        )
+    
+    def log_sensor_reading(self, reading: SensorReading):
+        """Log sensor reading to database"""
+        with self.lock:
+            self.conn.execute('''
+                INSERT INTO sensor_readings 
+                (location, temperature_f, humidity, vpd_kpa, dew_point_f)
+                VALUES (?, ?, ?, ?, ?)
+            ''', self._sensor_row(reading))
     
     def log_system_state(self, state: SystemState):
-        """Log complete system state"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Log overall state
-        cursor.execute('''
-            INSERT INTO system_states 
-            (phase, day, target_vpd, current_vpd, alarms)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            state.phase.value,
-            state.day,
-            state.target_vpd,
-            state.current_vpd,
-            json.dumps(state.alarms)
-        ))
-        
-        # Log all sensor readings
-        for reading in state.sensor_readings:
-            self.log_sensor_reading(reading)
-        
-        # Log equipment states
-        for equipment, eq_state in state.equipment_states.items():
-            cursor.execute('''
-                INSERT INTO equipment_states (equipment, state)
-                VALUES (?, ?)
-            ''', (equipment, eq_state.name))
-        
-        conn.commit()
-        conn.close()
+        """Log complete system state in a single transaction"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute('BEGIN')
+            try:
+                # Log overall state
+                cursor.execute('''
+                    INSERT INTO system_states 
+                    (phase, day, target_vpd, current_vpd, alarms)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    state.phase.value,
+                    state.day,
+                    state.target_vpd,
+                    state.current_vpd,
+                    json.dumps(state.alarms)
+                ))
+                
+                # Log all sensor readings
+                cursor.executemany('''
+                    INSERT INTO sensor_readings 
+                    (location, temperature_f, humidity, vpd_kpa, dew_point_f)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [self._sensor_row(r) for r in state.sensor_readings])
+                
+                # Log equipment states
+                cursor.executemany('''
+                    INSERT INTO equipment_states (equipment, state)
+                    VALUES (?, ?)
+                ''', [(equipment, eq_state.name)
+                      for equipment, eq_state in state.equipment_states.items()])
+                
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+    
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
 
 # ============================================================================
 # WEB INTERFACE AND API
@@ -586,7 +853,30 @@ class DataLogger:
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change in production
-socketio = SocketIO(app, cors_allowed_origins="*")
+
+
+class OrjsonCodec:
+    """json-module stand-in for python-socketio packet encoding"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+    
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    **({'json': OrjsonCodec} if ORJSON_AVAILABLE else {}))
+
+# Codec shared by SocketIO payloads and the Redis state channel
+_json_codec = OrjsonCodec if ORJSON_AVAILABLE else json
+
+# Redis channel the control loop publishes each SystemState to
+STATE_CHANNEL = 'system_state'
+
+# Equipment names never change, so the broadcast reuses one tuple of keys
+_EQUIP_KEYS = tuple(GPIO_PINS)
 
 # Global instances
 sensor_manager = None
@@ -594,37 +884,46 @@ equipment_controller = None
 vpd_controller = None
 data_logger = None
 redis_client = None
+mqtt_client = None
 
 @app.route('/')
 def index():
     """Serve main GUI"""
     return render_template('index.html')
 
+def serialize_state(state: SystemState) -> Dict:
+    """Convert a SystemState into the JSON shape used by the GUI"""
+    states = state.equipment_states
+    return {
+        'phase': state.phase.value,
+        'day': state.day,
+        'target_vpd': state.target_vpd,
+        'current_vpd': state.current_vpd,
+        'equipment': {k: states[k].name for k in _EQUIP_KEYS if k in states},
+        'sensors': [
+            {
+                'location': r.location,
+                'temperature': r.temperature_f,
+                'humidity': r.humidity,
+                'vpd': r.vpd_kpa,
+                'dew_point': r.dew_point_f
+            } for r in state.sensor_readings
+        ],
+        'alarms': state.alarms,
+        'timestamp': state.timestamp.isoformat()
+    }
+
 @app.route('/api/status')
 def get_status():
-    """Get current system status"""
+    """Get current system status from the last control step"""
     try:
-        state = vpd_controller.control_step()
+        with vpd_controller.state_lock:
+            state = vpd_controller.last_state
+        if state is None:
+            return jsonify({'success': False, 'error': 'No system state available yet'}), 503
         return jsonify({
             'success': True,
-            'data': {
-                'phase': state.phase.value,
-                'day': state.day,
-                'target_vpd': state.target_vpd,
-                'current_vpd': state.current_vpd,
-                'equipment': {k: v.name for k, v in state.equipment_states.items()},
-                'sensors': [
-                    {
-                        'location': r.location,
-                        'temperature': r.temperature_f,
-                        'humidity': r.humidity,
-                        'vpd': r.vpd_kpa,
-                        'dew_point': r.dew_point_f
-                    } for r in state.sensor_readings
-                ],
-                'alarms': state.alarms,
-                'timestamp': state.timestamp.isoformat()
-            }
+            'data': serialize_state(state)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -684,36 +983,80 @@ def handle_disconnect():
     logging.info('Client disconnected')
 
 def broadcast_system_state():
-    """Broadcast system state to all connected clients"""
+    """Broadcast system state to all connected clients
+    
+    Runs on a fixed CONTROL_INTERVAL grid so the cycle does not drift by the
+    work time each step; if a step overruns, missed ticks are skipped rather
+    than run back to back.
+    """
+    next_tick = time.monotonic()
     while True:
         try:
             state = vpd_controller.control_step()
             if state:
+                with vpd_controller.state_lock:
+                    vpd_controller.last_state = state
                 data_logger.log_system_state(state)
                 
-                # Broadcast to all connected clients
-                socketio.emit('system_update', {
-                    'phase': state.phase.value,
-                    'day': state.day,
-                    'target_vpd': state.target_vpd,
-                    'current_vpd': state.current_vpd,
-                    'equipment': {k: v.name for k, v in state.equipment_states.items()},
-                    'sensors': [
-                        {
-                            'location': r.location,
-                            'temperature': r.temperature_f,
-                            'humidity': r.humidity,
-                            'vpd': r.vpd_kpa,
-                            'dew_point': r.dew_point_f
-                        } for r in state.sensor_readings
-                    ],
-                    'alarms': state.alarms,
-                    'timestamp': state.timestamp.isoformat()
-                })
+                # Publish once; relay_state_updates fans out to clients
+                payload = serialize_state(state)
+                try:
+                    redis_client.publish(STATE_CHANNEL, _json_codec.dumps(payload))
+                except redis.RedisError as e:
+                    logging.warning(f"Redis publish failed, emitting directly: {e}")
+                    socketio.emit('system_update', payload)
+                
+                if mqtt_client:
+                    publish_telemetry(state)
         except Exception as e:
             logging.error(f"Error in broadcast loop: {e}")
         
-        time.sleep(5)  # Update every 5 seconds
+        next_tick += CONTROL_INTERVAL
+        now = time.monotonic()
+        if next_tick <= now:
+            next_tick += ((now - next_tick) // CONTROL_INTERVAL + 1) * CONTROL_INTERVAL
+        socketio.sleep(next_tick - now)
+
+# Topic strings per sensor/equipment, built on first use
+_sensor_topics: Dict[str, Tuple[str, str, str, str]] = {}
+_equipment_topics: Dict[str, str] = {}
+
+def publish_telemetry(state: SystemState):
+    """Publish each metric to its own retained MQTT topic"""
+    publish = mqtt_client.publish
+    publish(f'{MQTT_TOPIC_PREFIX}/vpd/current', f'{state.current_vpd:.3f}', retain=True)
+    publish(f'{MQTT_TOPIC_PREFIX}/vpd/target', f'{state.target_vpd:.3f}', retain=True)
+    publish(f'{MQTT_TOPIC_PREFIX}/phase', state.phase.value, retain=True)
+    
+    for r in state.sensor_readings:
+        topics = _sensor_topics.get(r.location)
+        if topics is None:
+            base = f'{MQTT_TOPIC_PREFIX}/sensor/{r.location}'
+            topics = _sensor_topics[r.location] = (
+                f'{base}/temp_f', f'{base}/rh', f'{base}/vpd', f'{base}/dew_point_f'
+            )
+        publish(topics[0], f'{r.temperature_f:.2f}', retain=True)
+        publish(topics[1], f'{r.humidity:.2f}', retain=True)
+        publish(topics[2], f'{r.vpd_kpa:.3f}', retain=True)
+        publish(topics[3], f'{r.dew_point_f:.2f}', retain=True)
+    
+    for equipment, eq_state in state.equipment_states.items():
+        topic = _equipment_topics.get(equipment)
+        if topic is None:
+            topic = _equipment_topics[equipment] = f'{MQTT_TOPIC_PREFIX}/equipment/{equipment.lower()}'
+        publish(topic, eq_state.name, retain=True)
+
+def relay_state_updates():
+    """Forward states published on Redis to all connected clients"""
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(STATE_CHANNEL)
+            for message in pubsub.listen():
+                socketio.emit('system_update', _json_codec.loads(message['data']))
+        except redis.RedisError as e:
+            logging.error(f"Redis subscriber error: {e}")
+            socketio.sleep(5)
 
 # ============================================================================
 # MAIN CONTROL LOOP
@@ -721,17 +1064,25 @@ def broadcast_system_state():
 
 def main():
     """Main control loop"""
-    global sensor_manager, equipment_controller, vpd_controller, data_logger, redis_client
+    global sensor_manager, equipment_controller, vpd_controller, data_logger, redis_client, mqtt_client
     
     # Setup logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('/home/mikejames/cannabis_dryer.log'),
-            logging.StreamHandler()
-        ]
-    )
+    # Records are enqueued by callers and written by a listener thread so
+    # disk flushes stay off the control loop
+    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    log_handlers = [
+        RotatingFileHandler('/home/mikejames/cannabis_dryer.log',
+                            maxBytes=5_000_000, backupCount=3),
+        logging.StreamHandler()
+    ]
+    for handler in log_handlers:
+        handler.setFormatter(log_formatter)
+    log_queue = queue.SimpleQueue()
+    log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+    log_listener.start()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
     
     logging.info("Starting Cannabis Drying Control System")
     
@@ -745,9 +1096,14 @@ def main():
         # Initialize Redis for inter-process communication
         redis_client = redis.Redis(host='localhost', port=6379, db=0)
         
-        # Start background control thread
-        control_thread = threading.Thread(target=broadcast_system_state, daemon=True)
-        control_thread.start()
+        # MQTT telemetry for external dashboards; connects in the background
+        mqtt_client = mqtt.Client(client_id='cannabis_dryer', clean_session=True)
+        mqtt_client.connect_async(MQTT_BROKER, MQTT_PORT, keepalive=60)
+        mqtt_client.loop_start()
+        
+        # Start background control and fan-out tasks on the SocketIO event loop
+        socketio.start_background_task(relay_state_updates)
+        socketio.start_background_task(broadcast_system_state)
         
         # Start Flask web server with SocketIO
         logging.info("Starting web server on port 5000")
@@ -761,7 +1117,13 @@ def main():
         # Cleanup
         if equipment_controller:
             equipment_controller.cleanup()
+        if data_logger:
+            data_logger.close()
+        if mqtt_client:
+            mqtt_client.loop_stop()
+            mqtt_client.disconnect()
         logging.info("System shutdown complete")
+        log_listener.stop()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Minimal SHT31 driver on smbus2
+
+Talks to the sensor with raw I2C_RDWR transfers on a shared SMBus instead
+of going through the Blinka/busio/adafruit_sht31d layers.
+"""
+
+import time
+import logging
+from smbus2 import SMBus, i2c_msg
+try:
+    from .sht31_crc import crc8
+except ImportError:
+    from sht31_crc import crc8
+
+logger = logging.getLogger(__name__)
+
+# Commands (MSB, LSB)
+MEASURE_HIGH_REP = [0x24, 0x00]      # Single-shot, high repeatability
+PERIODIC_1MPS_HIGH = [0x21, 0x30]    # Periodic 1 Hz, high repeatability
+FETCH_DATA = [0xE0, 0x00]            # Read the latest periodic result
+CONVERSION_TIME = 0.016              # Seconds (15 ms max + margin)
+
+
+class FastSHT31:
+    """SHT31 at one address on a shared SMBus"""
+    
+    def __init__(self, bus: SMBus, addr: int):
+        self.bus = bus
+        self.addr = addr
+    
+    def _read_result(self):
+        """Read one 6-byte result, None if either CRC fails"""
+        r = i2c_msg.read(self.addr, 6)
+        self.bus.i2c_rdwr(r)
+        b = bytes(r)
+        if crc8(b[0], b[1]) != b[2] or crc8(b[3], b[4]) != b[5]:
+            logger.warning("SHT31 0x%02X CRC mismatch: %s", self.addr, b.hex())
+            return None
+        temp_c = -45 + 175 * ((b[0] << 8) | b[1]) / 65535
+        humidity = 100 * ((b[3] << 8) | b[4]) / 65535
+        return temp_c, humidity
+    
+    def measure(self):
+        """Single-shot measurement, returns (temp_c, humidity)
+        
+        A CRC failure triggers one fresh measurement before giving up.
+        """
+        for _ in range(2):
+            self.bus.i2c_rdwr(i2c_msg.write(self.addr, MEASURE_HIGH_REP))
+            time.sleep(CONVERSION_TIME)
+            result = self._read_result()
+            if result is not None:
+                return result
+        raise OSError(f"SHT31 0x{self.addr:02X} CRC mismatch after retry")
+    
+    def start_periodic(self):
+        """Switch to 1 Hz periodic measurement mode"""
+        self.bus.i2c_rdwr(i2c_msg.write(self.addr, PERIODIC_1MPS_HIGH))
+    
+    def fetch(self):
+        """Latest periodic-mode result, returns (temp_c, humidity)"""
+        self.bus.i2c_rdwr(i2c_msg.write(self.addr, FETCH_DATA))
+        result = self._read_result()
+        if result is None:
+            # The fetched result is consumed; a new one arrives next period
+            raise OSError(f"SHT31 0x{self.addr:02X} CRC mismatch")
+        return result
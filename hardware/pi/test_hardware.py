@@ -4,12 +4,20 @@ Hardware Test Script for Cannabis Dryer Control System
 Tests all GPIO relays and I2C sensors
 """
 
+import os
 import time
 import sys
+import numpy as np
 import RPi.GPIO as GPIO
 import board
 import adafruit_sht31d
 
+# Shared VPD kernel lives in software/control
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from software.control.vpd_math import compute_vpd
+# One-conversion read of both values (adafruit_sht31d runs one per property)
+from sensor_manager import read_both
+
 print("=" * 60)
 print("Cannabis Dryer Hardware Test")
 print("=" * 60)
@@ -57,9 +65,10 @@ if choice in ['1', '3']:
     GPIO.setwarnings(False)
     
     # Initialize all pins as OFF (HIGH = OFF)
+    setup, output, out_mode = GPIO.setup, GPIO.output, GPIO.OUT
     for name, pin in RELAY_PINS.items():
-        GPIO.setup(pin, GPIO.OUT)
-        GPIO.output(pin, RELAY_OFF)
+        setup(pin, out_mode)
+        output(pin, RELAY_OFF)
         print(f"Initialized {name} on GPIO {pin} (OFF)")
     
     time.sleep(1)
@@ -68,10 +77,10 @@ if choice in ['1', '3']:
     for name, pin in RELAY_PINS.items():
         print(f"\nTesting {name} (GPIO {pin})...")
         print("  Turning ON (GPIO LOW)...")
-        GPIO.output(pin, RELAY_ON)
+        output(pin, RELAY_ON)
         time.sleep(2)
         print("  Turning OFF (GPIO HIGH)...")
-        GPIO.output(pin, RELAY_OFF)
+        output(pin, RELAY_OFF)
         time.sleep(1)
     
     print("\nRelay test complete!")
@@ -95,6 +104,7 @@ if choice in ['2', '3']:
         i2c = board.I2C()
         sensors_found = 0
         sensors_failed = 0
+        vpd_names, vpd_temps_c, vpd_hums = [], [], []
         
         for name, address in SENSOR_ADDRESSES.items():
             try:
@@ -104,8 +114,8 @@ if choice in ['2', '3']:
                 # Try multiple reads to ensure stability
                 readings = []
                 for i in range(3):
-                    temp_c = sensor.temperature
-                    humidity = sensor.relative_humidity
+                    # One conversion for both values
+                    temp_c, humidity = read_both(sensor)
                     temp_f = (temp_c * 9/5) + 32
                     readings.append((temp_f, humidity))
                     time.sleep(0.1)
@@ -117,12 +127,10 @@ if choice in ['2', '3']:
                 print(f"  Temperature: {avg_temp:.1f}°F ({(avg_temp-32)*5/9:.1f}°C)")
                 print(f"  Humidity: {avg_hum:.1f}%")
                 
-                # Calculate VPD
-                temp_c = (avg_temp - 32) * 5/9
-                svp = 0.61078 * (2.718281828 ** ((17.269 * temp_c) / (237.3 + temp_c)))
-                avp = svp * (avg_hum / 100)
-                vpd = svp - avp
-                print(f"  VPD: {vpd:.2f} kPa")
+                # Queue for the batched VPD calculation below
+                vpd_names.append(name)
+                vpd_temps_c.append((avg_temp - 32) * 5/9)
+                vpd_hums.append(avg_hum)
                 
                 sensors_found += 1
                 
@@ -130,6 +138,12 @@ if choice in ['2', '3']:
                 print(f"  ERROR: {str(e)}")
                 sensors_failed += 1
         
+        if vpd_names:
+            vpds = compute_vpd(np.array(vpd_temps_c), np.array(vpd_hums))
+            print("\nVPD:")
+            for name, vpd in zip(vpd_names, vpds):
+                print(f"  {name}: {vpd:.2f} kPa")
+        
         print("\n" + "=" * 40)
         print(f"Sensor Summary: {sensors_found} found, {sensors_failed} failed")
         
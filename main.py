@@ -3,40 +3,117 @@
 Main entry point for Cannabis Dryer Control System
 """
 
+# Serve SocketIO/HTTP on eventlet green threads when available; this has to
+# patch the standard library before anything else imports it
+try:
+    import eventlet
+    eventlet.monkey_patch()
+    from eventlet import tpool
+except ImportError:
+    tpool = None
+
 import sys
+import asyncio
 import threading
 import logging
 import time
 import os
-import platform
+from software.control.bootstrap import is_raspberry_pi, setup_logging, run_server
 from software.control.vpd_controller import PrecisionVPDController, SimulationMode
-from software.control.api_server import app, socketio, init_controller, start_background_tasks
-from software.control.precision_equipment_control import PrecisionEquipmentController
 
 
-# Setup logging FIRST (before any logger calls)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/dryer_control.log'),
-        logging.StreamHandler()
-    ]
-)
+# File logging is set up in __main__ so importing this module doesn't
+# create logs/dryer_control.log
+LOG_FILE = 'logs/dryer_control.log'
 logger = logging.getLogger(__name__)
 
 # Configuration - SET THIS BASED ON YOUR ENVIRONMENT
 SIMULATION_MODE = False  # Set to True ONLY for testing without sensors
+CONTROL_HEARTBEAT = 10  # Seconds; control pass runs at least this often
 
-# Detect if running on Raspberry Pi
-def is_raspberry_pi():
-    """Check if running on Raspberry Pi hardware"""
-    try:
-        with open('/proc/device-tree/model', 'r') as f:
-            return 'Raspberry Pi' in f.read()
-    except:
-        # Also check by CPU architecture
-        return platform.machine() in ['armv7l', 'aarch64']
+SIMULATION_INTERVAL = 2.0  # Seconds between simulated readings
+
+async def run_blocking(func, *args):
+    """Run a blocking call (I2C ioctls, fsync) without stalling the servers
+    
+    Under eventlet the default executor's threads are green, so a blocking
+    syscall there would still freeze the hub; tpool runs it on a native
+    thread instead. This waits in the calling green thread, pausing only
+    the control event loop, not the SocketIO server.
+    """
+    if tpool is not None:
+        return tpool.execute(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+async def run_simulator(simulator):
+    """Feed simulated sensor readings on a fixed 2 second cadence"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+    while True:
+        simulator.generate_readings()
+        # Sleep to the next deadline so generation time doesn't add drift
+        deadline += SIMULATION_INTERVAL
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+async def enhanced_control_loop(controller, equipment_controller, state_manager):
+    """Read sensors, drive equipment and persist state
+    
+    Runs as soon as new readings arrive (simulator, API updates) and at
+    least every CONTROL_HEARTBEAT seconds.
+    """
+    loop = asyncio.get_running_loop()
+    new_reading = controller.attach_event_loop(loop)
+    while True:
+        try:
+            logger.debug("Control loop iteration starting...")
+            # Blocking I2C reads run off the event loop (see run_blocking)
+            if controller.hardware_mode and controller.sensor_manager:
+                readings = await run_blocking(controller.sensor_manager.read_all_sensors)
+                controller.ingest_sensor_readings(readings)
+            # Everything ingested so far is handled by this pass
+            new_reading.clear()
+            
+            # Now update equipment using your precise control logic
+            try:
+                equipment_controller.update_equipment()
+                logger.debug("Equipment states: %s", equipment_controller.actual_states)
+            except Exception as e:
+                logger.error(f"Equipment control failed: {e}")
+                # Continue running - don't crash the main loop
+            
+            # Save state for power recovery
+            try:
+                await run_blocking(state_manager.save_state, {
+                    'process_active': controller.process_active,
+                    'current_phase': controller.current_phase.value,
+                    'process_start_time': controller.process_start_time,
+                    'phase_start_time': controller.phase_start_time,
+                    'equipment_states': dict(equipment_controller.actual_states)
+                })
+            except Exception as e:
+                logger.error(f"Failed to save state: {e}")
+
+            # Log status
+            status = controller.get_system_status()
+            logger.info(f"VPD: {status.get('current_vpd', 0):.2f} | "
+                    f"Temp: {status.get('current_temp', 0):.1f}°F | "
+                    f"RH: {status.get('current_humidity', 0):.1f}%")
+            
+            try:
+                await asyncio.wait_for(new_reading.wait(), timeout=CONTROL_HEARTBEAT)
+            except asyncio.TimeoutError:
+                pass
+        except Exception as e:
+            logger.error(f"Control loop error: {e}")
+            await asyncio.sleep(5)
+
+async def run_control_tasks(controller, equipment_controller, state_manager, simulator=None):
+    """Run the control loop (and simulator, if any) as tasks on one event loop"""
+    tasks = [asyncio.create_task(enhanced_control_loop(controller, equipment_controller, state_manager))]
+    if simulator is not None:
+        tasks.append(asyncio.create_task(run_simulator(simulator)))
+        logger.info("Simulation task started")
+    await asyncio.gather(*tasks)
 
 def main():
     """Start the complete system"""
@@ -64,6 +141,10 @@ def main():
         if not SIMULATION_MODE:
             print("Note: Not on Raspberry Pi - you may want to enable SIMULATION_MODE for testing")
     
+    # Hardware and web modules are imported here, once startup gets this far,
+    # so importing this module doesn't pull in GPIO or Flask/SocketIO
+    from software.control.precision_equipment_control import PrecisionEquipmentController
+    
     # Initialize the VPD controller
     logger.info("Initializing VPD Controller...")
     controller = PrecisionVPDController()
@@ -102,6 +183,7 @@ def main():
         logger.info("Starting fresh - no previous process running")
     
     # Check hardware mode vs simulation
+    simulator = None
     if controller.hardware_mode and not SIMULATION_MODE:
         print("Running with REAL SENSORS")
         logger.info(f"Hardware mode: Found {len(controller.sensor_manager.sensors)} sensors")
@@ -111,70 +193,23 @@ def main():
         
         # Initialize simulator for fake data
         simulator = SimulationMode(controller)
-        
-        # Start simulator in background thread
-        def run_simulator():
-            while True:
-                simulator.generate_readings()
-                time.sleep(2)
-        
-        sim_thread = threading.Thread(target=run_simulator, daemon=True)
-        sim_thread.start()
-        logger.info("Simulation thread started")
     
-    # Enhanced control loop with equipment controller
-    def enhanced_control_loop():
-        while True:
-            try:
-                logger.info("Control loop iteration starting...")
-                # Let the VPD controller read sensors and calculate
-                if controller.hardware_mode and controller.sensor_manager:
-                    readings = controller.sensor_manager.read_all_sensors()
-                    for sensor_id, reading in readings.items():
-                        if reading and reading.get('status') == 'ok':
-                            controller.update_sensor_reading(
-                                sensor_id,
-                                reading['temperature'],
-                                reading['humidity']
-                            )
-                
-                # Now update equipment using your precise control logic
-                try:
-                    equipment_controller.update_equipment()
-                    logger.info(f"Equipment states: {equipment_controller.actual_states}")
-                except Exception as e:
-                    logger.error(f"Equipment control failed: {e}")
-                    # Continue running - don't crash the main loop
-                
-                # Save state for power recovery
-                try:
-                    current_phase = controller.current_phase.value if hasattr(controller.current_phase, 'value') else str(controller.current_phase)
-                    state_manager.save_state({
-                        'process_active': getattr(controller, 'process_active', False),
-                        'current_phase': current_phase,
-                        'process_start_time': getattr(controller, 'process_start_time', None),
-                        'phase_start_time': getattr(controller, 'phase_start_time', None),
-                        'equipment_states': equipment_controller.actual_states
-                    })
-                except Exception as e:
-                    logger.error(f"Failed to save state: {e}")
-
-                # Log status
-                status = controller.get_system_status()
-                logger.info(f"VPD: {status.get('current_vpd', 0):.2f} | "
-                        f"Temp: {status.get('current_temp', 0):.1f}°F | "
-                        f"RH: {status.get('current_humidity', 0):.1f}%")
-                
-                time.sleep(10)
-            except Exception as e:
-                logger.error(f"Control loop error: {e}")
-                time.sleep(5)
-
-    control_thread = threading.Thread(target=enhanced_control_loop, daemon=True)
+    # Control loop and simulator share one asyncio loop on a single thread;
+    # the Flask-SocketIO server keeps the main thread. With eventlet,
+    # threading is monkey-patched, so this is a green thread on the same hub
+    # as the server: asyncio's patched selector yields to the hub while the
+    # loop idles, and blocking calls go through run_blocking's native tpool.
+    # Without eventlet it is an ordinary OS thread.
+    control_thread = threading.Thread(
+        target=asyncio.run,
+        args=(run_control_tasks(controller, equipment_controller, state_manager, simulator),),
+        daemon=True
+    )
     control_thread.start()
     logger.info("Control loop thread started")
     
     # Initialize Flask with BOTH controllers
+    from software.control.api_server import app, socketio, init_controller, start_background_tasks, ASYNC_MODE
     init_controller(controller, equipment_controller)
     
     # Start background tasks for web interface
@@ -188,24 +223,19 @@ def main():
     print("Press Ctrl+C to stop the system")
     print("------------------------------------------------------------")
     
-    # Start Flask web server
+    # Start Flask web server; debug only off the Pi
     try:
-        if is_pi:
-            # On Raspberry Pi - production mode
-            logger.info("Starting production web server on port 5001")
-            socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
-        else:
-            # On development machine
-            logger.info("Starting development web server on port 5001")
-            socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
+        logger.info("Starting %s web server on port 5001 (%s)",
+                    "production" if is_pi else "development", ASYNC_MODE)
+        run_server(app, socketio, ASYNC_MODE, debug=not is_pi)
     except Exception as e:
         logger.error(f"Failed to start web server: {e}")
         raise
 
 if __name__ == "__main__":
     try:
-        # Create logs directory if it doesn't exist
-        os.makedirs('logs', exist_ok=True)
+        # Setup logging FIRST (creates the logs directory if needed)
+        setup_logging(LOG_FILE)
         
         # Start the main application
         main()
@@ -7,6 +7,7 @@ Handles configuration management, database operations, and API endpoints
 import os
 import json
 import sqlite3
+import threading
 from datetime import datetime
 from flask import Flask, request, jsonify
 from flask_cors import CORS
@@ -24,10 +25,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# orjson is optional - it encodes/decodes the stored setting values faster
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    logger.warning("orjson not available - using stdlib JSON for settings values")
+
+def _dumps(value):
+    """Serialize a setting value to the JSON text stored in the database"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+def _loads(text):
+    """Parse stored JSON text (orjson.JSONDecodeError subclasses json's)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
 # Database configuration
 DB_PATH = Path('/home/pi/cannabis-controller/data/settings.db')
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# One connection shared by every request; the lock keeps transactions from
+# different request threads from interleaving
+_conn = None
+_db_lock = threading.RLock()
+
+def get_connection():
+    """Return the shared settings database connection, opening it on first use"""
+    global _conn
+    with _db_lock:
+        if _conn is None:
+            _conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+            # WAL lets readers run while a settings save is in progress
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA synchronous=NORMAL")
+            _conn.execute("PRAGMA temp_store=MEMORY")
+        return _conn
+
 # Default settings structure
 DEFAULT_SETTINGS = {
     'process': {
@@ -81,9 +119,23 @@ DEFAULT_SETTINGS = {
     }
 }
 
+# Default settings pre-serialized as (category, key, value_json) rows
+_DEFAULT_ROWS = [
+    (category, key, _dumps(value))
+    for category, settings in DEFAULT_SETTINGS.items()
+    for key, value in settings.items()
+]
+
 def init_database():
     """Initialize the database with settings and session tables"""
-    conn = sqlite3.connect(str(DB_PATH))
+    with _db_lock:
+        conn = get_connection()
+        with conn:
+            _init_tables(conn)
+    logger.info("Database initialized successfully")
+
+def _init_tables(conn):
+    """Create tables and seed defaults (caller holds _db_lock and commits)"""
     cursor = conn.cursor()
     
     # Settings table
@@ -125,133 +177,153 @@ def init_database():
         )
     ''')
     
+    # settings(category, key) is covered by its UNIQUE constraint
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_changed_at ON settings_history(changed_at DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status)")
+    
     # Initialize with default settings if empty
     cursor.execute("SELECT COUNT(*) FROM settings")
     if cursor.fetchone()[0] == 0:
-        save_all_settings(DEFAULT_SETTINGS, conn)
-    
-    conn.commit()
-    conn.close()
-    logger.info("Database initialized successfully")
+        cursor.executemany(
+            "INSERT INTO settings (category, key, value) VALUES (?, ?, ?)",
+            _DEFAULT_ROWS
+        )
+
+def _value_changed(old_text, value):
+    """Compare by value so stored text from another encoder isn't a change"""
+    try:
+        return _loads(old_text) != value
+    except json.JSONDecodeError:
+        return True
 
 def save_all_settings(settings_dict, conn=None):
     """Save all settings to database"""
-    close_conn = False
-    if conn is None:
-        conn = sqlite3.connect(str(DB_PATH))
-        close_conn = True
+    with _db_lock:
+        conn = conn or get_connection()
+        # Roll back on error so a failed write can't linger on the shared connection
+        with conn:
+            _save_all_settings(settings_dict, conn)
     
+    logger.info("Settings saved to database")
+
+def _save_all_settings(settings_dict, conn):
+    """Diff and write settings (caller holds _db_lock and commits)"""
     cursor = conn.cursor()
     
+    # One read of the current values, then diff in Python
+    cursor.execute("SELECT category, key, value FROM settings")
+    existing = {(category, key): value for category, key, value in cursor.fetchall()}
+    
+    to_insert = []
+    to_update = []
+    history_rows = []
     for category, settings in settings_dict.items():
         for key, value in settings.items():
-            # Check if setting exists
-            cursor.execute(
-                "SELECT value FROM settings WHERE category = ? AND key = ?",
-                (category, key)
-            )
-            existing = cursor.fetchone()
-            
             # Convert value to JSON string for storage
-            value_str = json.dumps(value)
+            value_str = _dumps(value)
+            old_value = existing.get((category, key))
             
-            if existing:
-                old_value = existing[0]
-                if old_value != value_str:
-                    # Update setting
-                    cursor.execute(
-                        "UPDATE settings SET value = ?, updated_at = CURRENT_TIMESTAMP WHERE category = ? AND key = ?",
-                        (value_str, category, key)
-                    )
-                    # Log change
-                    cursor.execute(
-                        "INSERT INTO settings_history (category, key, old_value, new_value) VALUES (?, ?, ?, ?)",
-                        (category, key, old_value, value_str)
-                    )
-            else:
-                # Insert new setting
-                cursor.execute(
-                    "INSERT INTO settings (category, key, value) VALUES (?, ?, ?)",
-                    (category, key, value_str)
-                )
-    
-    conn.commit()
-    if close_conn:
-        conn.close()
+            if old_value is None:
+                to_insert.append((category, key, value_str))
+            elif old_value != value_str and _value_changed(old_value, value):
+                to_update.append((value_str, category, key))
+                history_rows.append((category, key, old_value, value_str))
     
-    logger.info("Settings saved to database")
+    if to_insert:
+        cursor.executemany(
+            "INSERT INTO settings (category, key, value) VALUES (?, ?, ?)",
+            to_insert
+        )
+    if to_update:
+        cursor.executemany(
+            "UPDATE settings SET value = ?, updated_at = CURRENT_TIMESTAMP WHERE category = ? AND key = ?",
+            to_update
+        )
+        # Log changes
+        cursor.executemany(
+            "INSERT INTO settings_history (category, key, old_value, new_value) VALUES (?, ?, ?, ?)",
+            history_rows
+        )
 
 def load_all_settings():
     """Load all settings from database"""
-    conn = sqlite3.connect(str(DB_PATH))
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT category, key, value FROM settings")
-    rows = cursor.fetchall()
+    with _db_lock:
+        rows = get_connection().execute("SELECT category, key, value FROM settings").fetchall()
     
     settings = {}
     for category, key, value in rows:
         if category not in settings:
             settings[category] = {}
         try:
-            settings[category][key] = json.loads(value)
+            settings[category][key] = _loads(value)
         except json.JSONDecodeError:
             settings[category][key] = value
     
-    conn.close()
     return settings
 
 def get_setting(category, key):
     """Get a specific setting value"""
-    conn = sqlite3.connect(str(DB_PATH))
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT value FROM settings WHERE category = ? AND key = ?",
-        (category, key)
-    )
-    result = cursor.fetchone()
-    conn.close()
+    with _db_lock:
+        result = get_connection().execute(
+            "SELECT value FROM settings WHERE category = ? AND key = ?",
+            (category, key)
+        ).fetchone()
     
     if result:
         try:
-            return json.loads(result[0])
+            return _loads(result[0])
         except json.JSONDecodeError:
             return result[0]
     return None
 
-def update_setting(category, key, value):
-    """Update a specific setting"""
-    conn = sqlite3.connect(str(DB_PATH))
-    cursor = conn.cursor()
+def _write_settings(cursor, category, values):
+    """Write several settings of one category (caller holds _db_lock and commits)
     
-    # Get old value for history
+    Existing keys are updated with a history row each; missing keys are inserted.
+    """
+    placeholders = ','.join('?' * len(values))
     cursor.execute(
-        "SELECT value FROM settings WHERE category = ? AND key = ?",
-        (category, key)
+        f"SELECT key, value FROM settings WHERE category = ? AND key IN ({placeholders})",
+        (category, *values)
     )
-    old_value = cursor.fetchone()
+    existing = dict(cursor.fetchall())
     
-    value_str = json.dumps(value)
+    to_insert = []
+    to_update = {}
+    history_rows = []
+    for key, value in values.items():
+        value_str = _dumps(value)
+        if key in existing:
+            to_update[key] = value_str
+            history_rows.append((category, key, existing[key], value_str))
+        else:
+            to_insert.append((category, key, value_str))
     
-    if old_value:
+    if to_update:
+        # One statement for all existing keys
+        cases = ' '.join(['WHEN ? THEN ?'] * len(to_update))
         cursor.execute(
-            "UPDATE settings SET value = ?, updated_at = CURRENT_TIMESTAMP WHERE category = ? AND key = ?",
-            (value_str, category, key)
+            f"UPDATE settings SET value = CASE key {cases} END, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE category = ? AND key IN ({','.join('?' * len(to_update))})",
+            (*(item for pair in to_update.items() for item in pair), category, *to_update)
         )
-        # Log change
-        cursor.execute(
+        # Log changes
+        cursor.executemany(
             "INSERT INTO settings_history (category, key, old_value, new_value) VALUES (?, ?, ?, ?)",
-            (category, key, old_value[0], value_str)
+            history_rows
         )
-    else:
-        cursor.execute(
+    if to_insert:
+        cursor.executemany(
             "INSERT INTO settings (category, key, value) VALUES (?, ?, ?)",
-            (category, key, value_str)
+            to_insert
         )
-    
-    conn.commit()
-    conn.close()
+
+def update_setting(category, key, value):
+    """Update a specific setting"""
+    with _db_lock:
+        conn = get_connection()
+        with conn:
+            _write_settings(conn.cursor(), category, {key: value})
     
     logger.info(f"Updated setting: {category}.{key} = {value}")
 
@@ -307,23 +379,26 @@ def start_session():
     try:
         session_type = request.json.get('type', 'full')  # 'drying', 'curing', 'full'
         
-        # Update session settings
-        update_setting('process', 'session_active', True)
-        update_setting('process', 'session_start_time', datetime.now().isoformat())
-        update_setting('process', 'session_status', 'running')
+        start_time = datetime.now().isoformat()
         
-        # Create session record
-        conn = sqlite3.connect(str(DB_PATH))
-        cursor = conn.cursor()
-        
-        settings_snapshot = json.dumps(load_all_settings())
-        cursor.execute(
-            "INSERT INTO sessions (session_type, start_time, status, settings_snapshot) VALUES (?, ?, ?, ?)",
-            (session_type, datetime.now().isoformat(), 'running', settings_snapshot)
-        )
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        # Session settings and session record in one transaction
+        with _db_lock:
+            conn = get_connection()
+            with conn:
+                cursor = conn.cursor()
+                _write_settings(cursor, 'process', {
+                    'session_active': True,
+                    'session_start_time': start_time,
+                    'session_status': 'running'
+                })
+                
+                # Snapshot includes the updates above (same connection)
+                settings_snapshot = _dumps(load_all_settings())
+                cursor.execute(
+                    "INSERT INTO sessions (session_type, start_time, status, settings_snapshot) VALUES (?, ?, ?, ?)",
+                    (session_type, start_time, 'running', settings_snapshot)
+                )
+                session_id = cursor.lastrowid
         
         logger.info(f"Started new session: {session_id}")
         return jsonify({'success': True, 'session_id': session_id})
@@ -335,8 +410,13 @@ def start_session():
 def pause_session():
     """Pause the current session"""
     try:
-        update_setting('process', 'session_pause_time', datetime.now().isoformat())
-        update_setting('process', 'session_status', 'paused')
+        with _db_lock:
+            conn = get_connection()
+            with conn:
+                _write_settings(conn.cursor(), 'process', {
+                    'session_pause_time': datetime.now().isoformat(),
+                    'session_status': 'paused'
+                })
         
         logger.info("Session paused")
         return jsonify({'success': True, 'message': 'Session paused'})
@@ -348,20 +428,19 @@ def pause_session():
 def stop_session():
     """Stop the current session"""
     try:
-        # Update settings
-        update_setting('process', 'session_active', False)
-        update_setting('process', 'session_status', 'stopped')
-        
-        # Update session record
-        conn = sqlite3.connect(str(DB_PATH))
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "UPDATE sessions SET end_time = ?, status = ? WHERE status = 'running' OR status = 'paused'",
-            (datetime.now().isoformat(), 'completed')
-        )
-        conn.commit()
-        conn.close()
+        # Settings and session record in one transaction
+        with _db_lock:
+            conn = get_connection()
+            with conn:
+                cursor = conn.cursor()
+                _write_settings(cursor, 'process', {
+                    'session_active': False,
+                    'session_status': 'stopped'
+                })
+                cursor.execute(
+                    "UPDATE sessions SET end_time = ?, status = ? WHERE status = 'running' OR status = 'paused'",
+                    (datetime.now().isoformat(), 'completed')
+                )
         
         logger.info("Session stopped")
         return jsonify({'success': True, 'message': 'Session stopped'})
@@ -374,26 +453,27 @@ def export_data(format):
     """Export data in specified format"""
     try:
         if format == 'csv':
-            # Generate CSV export
-            settings = load_all_settings()
+            # Generate CSV export, streamed one row at a time
             import csv
             from io import StringIO
             
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['Category', 'Setting', 'Value', 'Updated'])
-            
-            conn = sqlite3.connect(str(DB_PATH))
-            cursor = conn.cursor()
-            cursor.execute("SELECT category, key, value, updated_at FROM settings ORDER BY category, key")
+            # Keep the shared connection only for the query itself
+            with _db_lock:
+                rows = get_connection().execute(
+                    "SELECT category, key, value, updated_at FROM settings ORDER BY category, key"
+                ).fetchall()
             
-            for row in cursor.fetchall():
-                writer.writerow(row)
-            
-            conn.close()
+            def generate():
+                line = StringIO()
+                writer = csv.writer(line)
+                for row in [('Category', 'Setting', 'Value', 'Updated')] + rows:
+                    writer.writerow(row)
+                    yield line.getvalue()
+                    line.seek(0)
+                    line.truncate(0)
             
             response = app.response_class(
-                output.getvalue(),
+                generate(),
                 mimetype='text/csv',
                 headers={'Content-Disposition': f'attachment;filename=settings_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
             )
@@ -413,25 +493,22 @@ def export_data(format):
 def get_settings_history():
     """Get settings change history"""
     try:
-        conn = sqlite3.connect(str(DB_PATH))
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT category, key, old_value, new_value, changed_by, changed_at FROM settings_history ORDER BY changed_at DESC LIMIT 100"
-        )
+        with _db_lock:
+            rows = get_connection().execute(
+                "SELECT category, key, old_value, new_value, changed_by, changed_at FROM settings_history ORDER BY changed_at DESC LIMIT 100"
+            ).fetchall()
         
         history = []
-        for row in cursor.fetchall():
+        for row in rows:
             history.append({
                 'category': row[0],
                 'key': row[1],
-                'old_value': json.loads(row[2]) if row[2] else None,
-                'new_value': json.loads(row[3]) if row[3] else None,
+                'old_value': _loads(row[2]) if row[2] else None,
+                'new_value': _loads(row[3]) if row[3] else None,
                 'changed_by': row[4],
                 'changed_at': row[5]
             })
         
-        conn.close()
         return jsonify({'success': True, 'history': history})
         
     except Exception as e:
@@ -4,8 +4,8 @@ Flask API Server for Cannabis Drying Control System
 Provides REST API for GUI interaction and remote monitoring
 """
 
-from software.control.vpd_controller import DryingPhase
-from flask import Flask, jsonify, request, render_template_string, send_from_directory, make_response
+from software.control.vpd_controller import DryingPhase, EquipmentState
+from flask import Flask, Response, jsonify, request, render_template_string, send_from_directory, make_response
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from datetime import datetime
@@ -16,14 +16,76 @@ import json
 import logging
 import os
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-socketio = SocketIO(app, cors_allowed_origins="*")
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Green-thread server when the entry point has monkey-patched with eventlet;
+# otherwise fall back to the threaded Werkzeug server
+ASYNC_MODE = 'threading'
+try:
+    import eventlet
+    if eventlet.patcher.is_monkey_patched('socket'):
+        ASYNC_MODE = 'eventlet'
+except ImportError:
+    logger.warning("eventlet not available - serving SocketIO with threads")
+
+# orjson serializes the status/sensor payloads several times faster
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    logger.warning("orjson not available - using stdlib JSON for API responses")
+
+
+def _orjson_default(obj):
+    """Handle the odd non-native value (numpy scalars, dates) in payloads"""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class OrjsonCodec:
+    """json-module stand-in for python-socketio packet encoding"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs) -> str:
+        return orjson.dumps(obj, default=_orjson_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+
+def ojsonify(obj) -> Response:
+    """jsonify() replacement for hot endpoints, backed by orjson when present"""
+    if not ORJSON_AVAILABLE:
+        return jsonify(obj)
+    return Response(
+        orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype='application/json'
+    )
+
+
+# Optional Redis message queue (e.g. redis://localhost:6379/0) so emits from
+# other processes or additional server workers reach every connected client
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+
+socketio_options = {}
+if ORJSON_AVAILABLE:
+    socketio_options['json'] = OrjsonCodec
+if SOCKETIO_MESSAGE_QUEUE:
+    socketio_options['message_queue'] = SOCKETIO_MESSAGE_QUEUE
+
+app = Flask(__name__)
+CORS(app)  # Enable CORS for all routes
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    **socketio_options)
+
 # Global controller instance
 controller = None
 
@@ -37,6 +99,21 @@ equipment_controller = None  # Add this global variable
 data_logger = []
 MAX_DATA_POINTS = 1000  # Keep last 1000 readings
 DATA_LOG_INTERVAL = 30  # Log every 30 seconds
+
+# Touchscreen equipment ids -> controller equipment_states keys
+_FRONTEND_TO_BACKEND = {
+    'mini_split': 'mini_split',
+    'mini-split': 'mini_split',
+    'dehumidifier': 'dehum',
+    'humidifier': 'hum_solenoid',
+    'erv': 'erv',
+    'supply_fan': 'supply_fan',
+    'supply-fan': 'supply_fan',
+    'exhaust_fan': 'return_fan',
+    'exhaust-fan': 'return_fan',
+    'return_fan': 'return_fan',
+    'return-fan': 'return_fan',
+}
 # Global update thread for background tasks
 update_thread = None
 
@@ -249,8 +326,9 @@ def get_status():
         logger.info(f"DEBUG: equipment_controller = {equipment_controller}, has actual_states = {hasattr(equipment_controller, 'actual_states') if equipment_controller else False}")
         equipment = {}
         if equipment_controller and hasattr(equipment_controller, 'actual_states'):
-            # Use the actual GPIO states from equipment controller
-            equipment = equipment_controller.actual_states.copy()
+            # Use the actual GPIO states from equipment controller; serialized
+            # straight away and never mutated here, so no copy is needed
+            equipment = equipment_controller.actual_states
             logger.info(f"DEBUG: Using equipment_controller.actual_states = {equipment}")
         elif hasattr(controller, 'equipment_states'):
             # Fallback to VPD controller states
@@ -317,7 +395,7 @@ def get_status():
             'debug': debug_info
         })
         
-        return jsonify(status)
+        return ojsonify(status)
         
     except Exception as e:
         logger.error(f"Error getting status: {e}")
@@ -351,18 +429,23 @@ def get_sensors():
     
     # In hardware mode, get ONLY real sensor data
     if controller.hardware_mode and controller.sensor_manager:
-        # Read the actual hardware sensors
-        for sensor_name in ['dry_room_1', 'supply_duct']:
-            if sensor_name in controller.sensor_manager.sensors:
-                reading = controller.sensor_manager.read_sensor(sensor_name)
-                if reading:
-                    sensors[sensor_name] = {
-                        'temperature': reading.get('temperature'),
-                        'humidity': reading.get('humidity'),
-                        'timestamp': reading.get('timestamp', datetime.now()).isoformat() if reading.get('timestamp') else datetime.now().isoformat()
-                    }
+        from software.control.sensor_manager import STATUS_OK
+        
+        # Latest values kept by the sensor reader; no bus access here
+        sensor_manager = controller.sensor_manager
+        temps_f = sensor_manager.temperatures_f().tolist()
+        humidities = sensor_manager.humidities.tolist()
+        timestamps = sensor_manager.timestamps.tolist()
+        status = sensor_manager.status.tolist()
+        for i, sensor_name in enumerate(sensor_manager.sensor_ids):
+            if sensor_name in sensors and status[i] == STATUS_OK:
+                sensors[sensor_name] = {
+                    'temperature': temps_f[i],
+                    'humidity': humidities[i],
+                    'timestamp': datetime.fromtimestamp(timestamps[i]).isoformat()
+                }
     
-    return jsonify(sensors)
+    return ojsonify(sensors)
 
 @app.route('/api/sensors/<sensor_id>', methods=['POST'])
 def update_sensor(sensor_id):
@@ -401,9 +484,7 @@ def toggle_equipment(equipment_id):
         return jsonify({'error': 'System not initialized'}), 503
     
     try:
-        from software.control.vpd_controller import EquipmentState
-        
-        equipment_id = equipment_id.upper().replace('-', '_')
+        equipment_id = _FRONTEND_TO_BACKEND.get(equipment_id, equipment_id)
         
         # Get current state
         current_state = EquipmentState.OFF
@@ -674,13 +755,36 @@ def handle_update_request():
         status = controller.get_system_status()
         emit('status_update', status)
 
+STATUS_HEARTBEAT_INTERVAL = 30  # Re-send unchanged status at least this often
+
+def _status_fingerprint():
+    """Hash of the controller state clients actually render"""
+    return hash((
+        controller.process_active,
+        controller.current_phase,
+        tuple((k, v.value) for k, v in controller.equipment_states.items()),
+        tuple(
+            (k, round(r.temperature, 1), round(r.humidity, 1))
+            for k, r in controller.sensor_readings.items()
+        ),
+    ))
+
 def broadcast_updates():
-    """Background thread to broadcast system updates"""
+    """Background task to broadcast system updates when state changes"""
+    last_fingerprint = None
+    last_emit = 0.0
     while True:
-        time.sleep(5)  # Broadcast every 5 seconds
+        socketio.sleep(5)  # Check for changes every 5 seconds; yields to other greenlets
         if controller:
+            fingerprint = _status_fingerprint()
+            now = time.monotonic()
+            if (fingerprint == last_fingerprint
+                    and now - last_emit < STATUS_HEARTBEAT_INTERVAL):
+                continue
             status = controller.get_system_status()
             socketio.emit('status_update', status, to='/')
+            last_fingerprint = fingerprint
+            last_emit = now
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
@@ -1310,9 +1414,8 @@ def start_background_tasks():
     """Start background tasks"""
     global update_thread
     if update_thread is None:
-        update_thread = threading.Thread(target=broadcast_updates, daemon=True)
-        update_thread.start()
-        logger.info("Background update thread started")
+        update_thread = socketio.start_background_task(broadcast_updates)
+        logger.info("Background update task started")
 
 # Data logging functions
 
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Startup helpers shared by the entry points
+Platform detection, queued logging and web server start
+"""
+
+import atexit
+import functools
+import logging
+import os
+import platform
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+@functools.lru_cache(maxsize=1)
+def is_raspberry_pi():
+    """Check if running on Raspberry Pi hardware (cached; it can't change)"""
+    try:
+        with open('/proc/device-tree/model', 'r') as f:
+            return 'Raspberry Pi' in f.read()
+    except:
+        # Also check by CPU architecture
+        return platform.machine() in ['armv7l', 'aarch64']
+
+
+def setup_logging(log_file, level=logging.INFO, max_bytes=5_000_000, backup_count=3):
+    """Route all logging through a queue drained by a background listener
+
+    Callers only enqueue records; the listener thread does the file and
+    console writes. Handlers installed earlier (e.g. by a module-level
+    basicConfig) are removed. Returns the started listener.
+    """
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count),
+        logging.StreamHandler()
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Drain queued records on exit
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.setLevel(level)
+    root_logger.addHandler(QueueHandler(log_queue))
+    return listener
+
+
+def run_server(app, socketio, async_mode, debug=False, port=5000):
+    """Serve the Flask-SocketIO app; Werkzeug is only allowed as a fallback"""
+    server_options = {} if async_mode == 'eventlet' else {'allow_unsafe_werkzeug': True}
+    socketio.run(app, host='0.0.0.0', port=port, debug=debug, **server_options)
@@ -180,9 +180,9 @@ class IntelligentController:
             # Convert to VPDReading format
             vpd_reading = self.vpd_calc.calculate_vpd_from_conditions(
                 reading_data["temperature"], 
-                reading_data["humidity"]
+                reading_data["humidity"],
+                timestamp=current_time
             )
-            vpd_reading.timestamp = current_time
             
             # Add to history
             history = self.sensor_history[zone]
@@ -287,8 +287,11 @@ class IntelligentController:
         actions = []
         
         # Get current phase targets
-        current_phase = self.vpd_calc.get_current_phase_from_elapsed_time(start_time)
-        phase_progress = self.vpd_calc.calculate_phase_progress(start_time, current_phase)
+        elapsed_hours = self.vpd_calc.elapsed_hours(start_time)
+        current_phase = self.vpd_calc.get_phase_for_elapsed_hours(elapsed_hours)
+        phase_progress = self.vpd_calc.calculate_phase_progress_for_elapsed_hours(
+            elapsed_hours, current_phase
+        )
         target_temp, target_dew, target_rh = self.vpd_calc.get_phase_target_conditions(
             current_phase, phase_progress
         )
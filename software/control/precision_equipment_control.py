@@ -21,6 +21,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# pigpio (optional) lets emergency_stop drop every relay with one bank write
+PIGPIO_AVAILABLE = False
+try:
+    import pigpio
+    PIGPIO_AVAILABLE = True
+except ImportError:
+    logger.warning("pigpio not available - emergency stop switches one pin at a time")
+
 class ControlMode(Enum):
     """Control modes for each equipment"""
     AUTO = "AUTO"
@@ -62,7 +70,7 @@ class PrecisionEquipmentController:
             for equipment, pin in self.gpio_pins.items():
                 GPIO.setup(pin, GPIO.OUT)
                 GPIO.output(pin, GPIO.HIGH)  # Start OFF (HIGH = OFF for active LOW relays)
-                logger.info(f"GPIO {pin} initialized for {equipment} (OFF)")
+                logger.info("GPIO %d initialized for %s (OFF)", pin, equipment)
             
             self.gpio_initialized = True
             logger.info("GPIO initialization complete")
@@ -71,6 +79,25 @@ class PrecisionEquipmentController:
             logger.error(f"Failed to initialize GPIO: {e}")
             self.gpio_pins = {}
         
+        # Small-int ids for relay equipment so the switching path indexes
+        # lists instead of hashing names (actual_states stays the record of
+        # what each relay is set to)
+        self.equip_ids = {name: i for i, name in enumerate(self.gpio_pins)}
+        self.pin_by_id = list(self.gpio_pins.values())
+        
+        # All relay pins are in GPIO bank 1 (0-31), so one set_bank_1 write
+        # drives every relay HIGH (OFF) at the same instant
+        self._relay_mask = 0
+        for pin in self.pin_by_id:
+            self._relay_mask |= 1 << pin
+        self._pi = None
+        if self.gpio_initialized and PIGPIO_AVAILABLE:
+            pi = pigpio.pi()
+            if pi.connected:
+                self._pi = pi
+            else:
+                logger.warning("pigpio daemon not running - emergency stop switches one pin at a time")
+        
         # Control modes for each equipment (AUTO, ON, OFF)
         self.control_modes = {
             'dehum': ControlMode.AUTO,
@@ -143,13 +170,16 @@ class PrecisionEquipmentController:
             return False
         
         try:
-            import RPi.GPIO as GPIO
-            
-            # Turn off ALL GPIO pins immediately
+            # Turn off ALL GPIO pins immediately - in one write when possible
+            if self._pi is not None:
+                self._pi.set_bank_1(self._relay_mask)
+            else:
+                output, high = GPIO.output, GPIO.HIGH
+                for pin in self.pin_by_id:
+                    output(pin, high)  # HIGH = OFF (Active LOW relays)
             for equipment, pin in self.gpio_pins.items():
-                GPIO.output(pin, GPIO.HIGH)  # HIGH = OFF (Active LOW relays)
                 self.actual_states[equipment] = 'OFF'
-                logger.info(f"EMERGENCY STOP: {equipment} = OFF (GPIO {pin} = HIGH)")
+                logger.info("EMERGENCY STOP: %s = OFF (GPIO %d = HIGH)", equipment, pin)
             
             # Also update VPD controller states
             from software.control.vpd_controller import EquipmentState
@@ -226,7 +256,7 @@ class PrecisionEquipmentController:
                         self.actual_states[equipment] = hardware_state
                         synced_count += 1
                     else:
-                        logger.debug(f"✅ {equipment} state matches: {hardware_state}")
+                        logger.debug("✅ %s state matches: %s", equipment, hardware_state)
                         
                 except Exception as e:
                     logger.error(f"Failed to read GPIO pin {pin} for {equipment}: {e}")
@@ -240,23 +270,22 @@ class PrecisionEquipmentController:
     
     def _apply_state(self, equipment, state):
         """Apply the desired state to the equipment (ON/OFF)"""
-        logger.info(f"Setting {equipment} to {state}")
+        logger.info("Setting %s to %s", equipment, state)
         
-        if equipment not in self.gpio_pins:
-            logger.debug(f"No GPIO pin for {equipment} (OK for mini_split)")
+        i = self.equip_ids.get(equipment)
+        if i is None:
+            logger.debug("No GPIO pin for %s (OK for mini_split)", equipment)
             # Still update actual_states even for equipment without GPIO pins
             self.actual_states[equipment] = state
             return True  # Not an error for equipment without GPIO pins
         
         try:
-            import RPi.GPIO as GPIO
-            
-            pin = self.gpio_pins[equipment]
-            gpio_state = GPIO.LOW if state == 'ON' else GPIO.HIGH
+            pin = self.pin_by_id[i]
+            on = state == 'ON'
             
             # Set the GPIO pin to the desired state
-            GPIO.output(pin, gpio_state)
-            logger.info(f"  ➡️  {equipment} set to {state} (GPIO {pin} = {'LOW' if state == 'ON' else 'HIGH'})")
+            GPIO.output(pin, GPIO.LOW if on else GPIO.HIGH)
+            logger.info("  ➡️  %s set to %s (GPIO %d = %s)", equipment, state, pin, 'LOW' if on else 'HIGH')
             
             # CRITICAL: Update actual_states when GPIO operation succeeds
             self.actual_states[equipment] = state
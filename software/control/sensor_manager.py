@@ -5,14 +5,86 @@ Sensor Manager for SHT31 Temperature/Humidity Sensors
 
 import time
 import logging
-from datetime import datetime
+import threading
 from typing import Dict, Optional
+import numpy as np
 import board
 import busio
 import adafruit_sht31d
 
+try:
+    from .sht31_crc import crc8
+except ImportError:
+    from sht31_crc import crc8
+
 logger = logging.getLogger(__name__)
 
+# smbus2 lets us skip the Blinka/busio layers with raw I2C_RDWR transfers
+SMBUS_AVAILABLE = False
+try:
+    from smbus2 import SMBus
+    try:
+        from .sht31_fast import FastSHT31
+    except ImportError:
+        from sht31_fast import FastSHT31
+    SMBUS_AVAILABLE = True
+except ImportError:
+    logger.warning("smbus2 not available - using adafruit_sht31d driver")
+
+I2C_BUS = 1  # /dev/i2c-1 on Raspberry Pi; clock is set in config.txt (see docs/raspberry_pi/SETUP.md)
+
+# SHT31 single-shot, high repeatability, no clock stretching
+SHT31_MEASURE_HIGH_REP = bytes([0x24, 0x00])
+SHT31_CONVERSION_TIME = 0.015  # Seconds (15 ms max for high repeatability)
+# Periodic mode: 1 measurement/s, high repeatability; results fetched later
+SHT31_PERIODIC_1MPS_HIGH = bytes([0x21, 0x30])
+SHT31_FETCH_DATA = bytes([0xE0, 0x00])
+SHT31_PERIODIC_PERIOD = 1.0  # Seconds
+
+# Per-sensor status codes in SensorManager.status
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_UNREAD = 2
+
+
+def _decode(buf: bytearray, verify_crc: bool):
+    """Decode a 6-byte SHT31 result into (temp_c, humidity)"""
+    if verify_crc and (crc8(buf[0], buf[1]) != buf[2] or crc8(buf[3], buf[4]) != buf[5]):
+        raise RuntimeError("SHT31 CRC mismatch")
+    
+    temp_c = -45 + 175 * ((buf[0] << 8) | buf[1]) / 65535.0
+    humidity = 100 * ((buf[3] << 8) | buf[4]) / 65535.0
+    return temp_c, humidity
+
+
+def start_periodic(sensor):
+    """Put an SHT31 into 1 Hz periodic measurement mode"""
+    with sensor.i2c_device as i2c:
+        i2c.write(SHT31_PERIODIC_1MPS_HIGH)
+
+
+def fetch(sensor, verify_crc: bool = False):
+    """Fetch the latest periodic-mode result without waiting for a conversion"""
+    buf = bytearray(6)
+    with sensor.i2c_device as i2c:
+        i2c.write(SHT31_FETCH_DATA)
+        i2c.readinto(buf)
+    return _decode(buf, verify_crc)
+
+
+def read_both(sensor, verify_crc: bool = False):
+    """Read temperature (°C) and RH (%) from one SHT31 measurement
+    
+    The adafruit properties each run their own single-shot measurement;
+    this issues one command and decodes both values from the same 6 bytes.
+    """
+    buf = bytearray(6)
+    with sensor.i2c_device as i2c:
+        i2c.write(SHT31_MEASURE_HIGH_REP)
+        time.sleep(SHT31_CONVERSION_TIME)
+        i2c.readinto(buf)
+    return _decode(buf, verify_crc)
+
 class SensorManager:
     """Manages SHT31 sensors on I2C bus"""
     
@@ -27,26 +99,85 @@ class SensorManager:
         # 'utility_room': 0x3C,
     }
     
-    def __init__(self):
-        """Initialize I2C and sensors"""
+    def __init__(self, cache_ttl: float = 0.5, background: bool = True):
+        """Initialize I2C and sensors
+        
+        Args:
+            cache_ttl: Seconds a full read_all_sensors() result is reused
+                (refresh period of the background reader); raised to
+                SHT31_PERIODIC_PERIOD while any sensor is in periodic mode
+            background: Scan the bus on a worker thread so read_all_sensors()
+                returns the latest snapshot without touching I2C
+        """
         self.sensors = {}
         self.last_readings = {}
+        
+        # Latest values as parallel arrays, one slot per configured sensor
+        self.sensor_ids = list(self.SENSOR_ADDRESSES)
+        self._slot = {sensor_id: i for i, sensor_id in enumerate(self.sensor_ids)}
+        n = len(self.sensor_ids)
+        self.temps_c = np.zeros(n)  # °F is derived on demand, see temperatures_f()
+        self.humidities = np.zeros(n)
+        self.timestamps = np.zeros(n)
+        self.status = np.full(n, STATUS_UNREAD, dtype=np.uint8)
+        
+        self.cache_ttl = cache_ttl
+        self._cached_readings = {}
+        self._last_read_monotonic = 0.0
+        # Sensors running in periodic mode, read with fetch() instead of a
+        # blocking single-shot measurement
+        self.periodic_sensors = set()
+        self._periodic_ready_at = 0.0
+        # FastSHT31 on one shared SMBus when smbus2 is installed
+        self.fast_driver = SMBUS_AVAILABLE
+        self.bus = None
         self.initialize_sensors()
+        
+        # Background reader: one worker owns the bus, callers get snapshots.
+        # Daemon thread so an un-closed manager never blocks interpreter exit
+        self._snapshot = {}
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_ready = threading.Event()
+        self._stop = threading.Event()
+        self._reader = None
+        if background:
+            self._reader = threading.Thread(target=self._reader_loop,
+                                            name='sensor-reader', daemon=True)
+            self._reader.start()
     
     def initialize_sensors(self):
         """Initialize all configured sensors"""
         try:
             # Create I2C bus
-            i2c = busio.I2C(board.SCL, board.SDA)
+            if self.fast_driver:
+                self.bus = SMBus(I2C_BUS)
+            else:
+                i2c = busio.I2C(board.SCL, board.SDA)
             
             # Initialize each sensor
             for name, address in self.SENSOR_ADDRESSES.items():
                 try:
-                    sensor = adafruit_sht31d.SHT31D(i2c, address=address)
+                    if self.fast_driver:
+                        sensor = FastSHT31(self.bus, address)
+                    else:
+                        sensor = adafruit_sht31d.SHT31D(i2c, address=address)
                     self.sensors[name] = sensor
-                    logger.info(f"Initialized sensor {name} at address 0x{address:02X}")
+                    logger.info("Initialized sensor %s at address 0x%02X", name, address)
                 except Exception as e:
                     logger.error(f"Failed to initialize sensor {name} at 0x{address:02X}: {e}")
+                    continue
+                
+                try:
+                    if self.fast_driver:
+                        sensor.start_periodic()
+                    else:
+                        start_periodic(sensor)
+                    self.periodic_sensors.add(name)
+                except Exception as e:
+                    logger.warning(f"Sensor {name} staying in single-shot mode: {e}")
+            
+            # First result is available one period after starting
+            self._periodic_ready_at = time.monotonic() + SHT31_PERIODIC_PERIOD
                     
         except Exception as e:
             logger.error(f"Failed to initialize I2C bus: {e}")
@@ -55,23 +186,36 @@ class SensorManager:
     def read_sensor(self, sensor_id: str) -> Optional[Dict]:
         """Read a single sensor"""
         if sensor_id not in self.sensors:
-            logger.warning(f"Sensor {sensor_id} not found")
+            logger.warning("Sensor %s not found", sensor_id)
             return None
             
         try:
             sensor = self.sensors[sensor_id]
-            temp_c = sensor.temperature
-            humidity = sensor.relative_humidity
+            if self.fast_driver:
+                if sensor_id in self.periodic_sensors:
+                    temp_c, humidity = sensor.fetch()
+                else:
+                    temp_c, humidity = sensor.measure()
+            elif sensor_id in self.periodic_sensors:
+                temp_c, humidity = fetch(sensor)
+            else:
+                temp_c, humidity = read_both(sensor)
             
             # Convert to Fahrenheit
             temp_f = (temp_c * 9/5) + 32
+            now = time.time()
+            
+            i = self._slot[sensor_id]
+            self.temps_c[i] = temp_c
+            self.humidities[i] = humidity
+            self.timestamps[i] = now
+            self.status[i] = STATUS_OK
             
             reading = {
                 'sensor_id': sensor_id,
                 'temperature': temp_f,
                 'humidity': humidity,
-                'temperature_c': temp_c,
-                'timestamp': datetime.now(),
+                'timestamp': now,  # Epoch seconds; format when serializing
                 'status': 'ok'
             }
             
@@ -79,19 +223,37 @@ class SensorManager:
             return reading
             
         except Exception as e:
-            logger.error(f"Error reading sensor {sensor_id}: {e}")
+            logger.error("Error reading sensor %s: %s", sensor_id, e)
+            self.status[self._slot[sensor_id]] = STATUS_ERROR
             return {
                 'sensor_id': sensor_id,
                 'temperature': 0,
                 'humidity': 0,
-                'temperature_c': 0,
-                'timestamp': datetime.now(),
+                'timestamp': time.time(),  # Epoch seconds; format when serializing
                 'status': 'error',
                 'error': str(e)
             }
     
-    def read_all_sensors(self) -> Dict:
-        """Read all configured sensors"""
+    def _refresh_period(self) -> float:
+        """Seconds between bus scans
+        
+        A periodic-mode SHT31 NACKs a fetch until its next result is ready,
+        so scanning faster than the measurement period only produces errors.
+        """
+        if self.periodic_sensors:
+            return max(self.cache_ttl, SHT31_PERIODIC_PERIOD)
+        return self.cache_ttl
+    
+    def _read_all_uncached(self) -> Dict:
+        """Scan every configured sensor on the bus
+        
+        Periodic-mode sensors convert on their own, so this is one short
+        fetch per sensor with no per-sensor conversion wait.
+        """
+        wait = self._periodic_ready_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        
         readings = {}
         for sensor_id in self.sensors.keys():
             reading = self.read_sensor(sensor_id)
@@ -99,19 +261,69 @@ class SensorManager:
                 readings[sensor_id] = reading
         return readings
     
+    def _reader_loop(self):
+        """Refresh the snapshot every _refresh_period() seconds until close()"""
+        while not self._stop.is_set():
+            try:
+                readings = self._read_all_uncached()
+                with self._snapshot_lock:
+                    self._snapshot = readings
+                self._snapshot_ready.set()
+            except Exception as e:
+                logger.error("Background sensor read failed: %s", e)
+            self._stop.wait(self._refresh_period())
+    
+    def read_all_sensors(self) -> Dict:
+        """Read all configured sensors
+        
+        With the background reader running this returns the latest snapshot
+        (waiting only for the first scan). Otherwise results are reused for
+        _refresh_period() seconds unless a sensor reported an error.
+        """
+        if self._reader is not None:
+            self._snapshot_ready.wait(timeout=SHT31_PERIODIC_PERIOD + 1.0)
+            with self._snapshot_lock:
+                return self._snapshot
+        
+        if time.monotonic() - self._last_read_monotonic < self._refresh_period():
+            return self._cached_readings
+        
+        readings = self._read_all_uncached()
+        self._cached_readings = readings
+        if all(r['status'] == 'ok' for r in readings.values()):
+            self._last_read_monotonic = time.monotonic()
+        else:
+            # Don't hold on to errors; the next call retries the bus
+            self._last_read_monotonic = 0.0
+        return readings
+    
+    def temperatures_f(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Latest temperatures in °F, converted from temps_c in one pass"""
+        out = np.multiply(self.temps_c, 1.8, out=out)
+        out += 32
+        return out
+    
     def get_average_readings(self) -> Dict:
         """Get average of all working sensors"""
-        all_readings = self.read_all_sensors()
-        working_readings = [r for r in all_readings.values() if r['status'] == 'ok']
+        self.read_all_sensors()
+        ok = self.status == STATUS_OK
+        n = int(np.count_nonzero(ok))
         
-        if not working_readings:
+        if n == 0:
             return {'temperature': 0, 'humidity': 0, 'sensor_count': 0}
         
-        avg_temp = sum(r['temperature'] for r in working_readings) / len(working_readings)
-        avg_humidity = sum(r['humidity'] for r in working_readings) / len(working_readings)
-        
         return {
-            'temperature': avg_temp,
-            'humidity': avg_humidity,
-            'sensor_count': len(working_readings)
-        }
\ No newline at end of file
+            'temperature': float(self.temps_c[ok].mean()) * 1.8 + 32,
+            'humidity': float(self.humidities[ok].mean()),
+            'sensor_count': n
+        }
+    
+    def close(self):
+        """Stop the background reader and release the I2C bus"""
+        self._stop.set()
+        if self._reader is not None:
+            self._reader.join(timeout=SHT31_PERIODIC_PERIOD + 1.0)
+            self._reader = None
+        if self.bus is not None:
+            self.bus.close()
+            self.bus = None
\ No newline at end of file
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Sensirion CRC-8 for SHT31 results
+
+Kept free of I2C imports so both SHT31 drivers (smbus2 and adafruit) can
+share one lookup table.
+"""
+
+
+def _make_crc8_table() -> bytes:
+    """Sensirion CRC-8 (poly 0x31) of every single-byte value"""
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return bytes(table)
+
+
+_CRC8_TABLE = _make_crc8_table()
+
+
+def crc8(msb: int, lsb: int) -> int:
+    """CRC-8 (init 0xFF) of one 16-bit word via table lookup"""
+    return _CRC8_TABLE[_CRC8_TABLE[0xFF ^ msb] ^ lsb]
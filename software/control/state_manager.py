@@ -1,15 +1,23 @@
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 
+MIN_SAVE_INTERVAL = 60  # Seconds between routine saves of unchanged process state
+
 class StateManager:
     """Manages persistent state for power loss recovery"""
     
-    def __init__(self, state_file='data/system_state.json'):
+    def __init__(self, state_file='data/system_state.json', min_interval=MIN_SAVE_INTERVAL):
         self.state_file = Path(__file__).parent.parent.parent / state_file
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
         self.state = self.load_state()
+        # Debounce SD card writes from callers that save on every loop pass
+        self.min_interval = min_interval
+        self._last_saved = None
+        self._last_process_key = None
+        self._last_save_time = 0.0
     
     def load_state(self):
         """Load saved state or return defaults"""
@@ -42,8 +50,13 @@ class StateManager:
             }
         }
     
-    def save_state(self, state):
-        """Save current state to file"""
+    def save_state(self, state, force=False):
+        """Save current state to file
+        
+        Identical state is never rewritten, and other changes are written at
+        most every min_interval seconds unless process_active or
+        current_phase changed (or force is set). Returns True if written.
+        """
         save_data = state.copy()
         # Convert datetime to ISO strings for JSON
         if save_data.get('process_start_time'):
@@ -51,5 +64,25 @@ class StateManager:
         if save_data.get('phase_start_time'):
             save_data['phase_start_time'] = save_data['phase_start_time'].isoformat()
         
-        with open(self.state_file, 'w') as f:
-            json.dump(save_data, f, indent=2)
\ No newline at end of file
+        payload = json.dumps(save_data, indent=2)
+        process_key = (save_data.get('process_active'), save_data.get('current_phase'))
+        now = time.monotonic()
+        if not force:
+            if payload == self._last_saved:
+                return False
+            if (process_key == self._last_process_key
+                    and now - self._last_save_time < self.min_interval):
+                return False
+        
+        # Write-then-rename so a power cut never leaves a truncated file
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.state_file)
+        
+        self._last_saved = payload
+        self._last_process_key = process_key
+        self._last_save_time = now
+        return True
\ No newline at end of file
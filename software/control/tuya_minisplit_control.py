@@ -17,7 +17,20 @@ class TuyaMiniSplitController:
     Integrates with Cannabis Dryer VPD control system
     """
     
-    def __init__(self, device_id: str, ip_address: str, local_key: str):
+    # Our mode names -> Tuya protocol mode values
+    _MODE_MAP = {
+        'cool': 'cold',
+        'heat': 'hot',
+        'dry': 'wet',
+        'fan': 'wind',
+        'auto': 'auto'
+    }
+    _TEMP_SCALE = 10  # Scale factor for temperature (680 = 68.0°F)
+    _TEMP_MIN_F = 60
+    _TEMP_MAX_F = 75
+    
+    def __init__(self, device_id: str, ip_address: str, local_key: str,
+                 status_ttl: float = 2.0):
         """
         Initialize controller
         
@@ -25,6 +38,7 @@ class TuyaMiniSplitController:
             device_id: Tuya device ID
             ip_address: Local IP address
             local_key: Local encryption key
+            status_ttl: Seconds a get_status() result is reused before re-polling
         """
         self.device = tinytuya.OutletDevice(
             dev_id=device_id,
@@ -39,10 +53,15 @@ class TuyaMiniSplitController:
         self.DP_TEMP_CURRENT_F = 23
         self.DP_MODE = 4
         
-        self.temp_scale = 10  # Scale factor for temperature
+        self.temp_scale = self._TEMP_SCALE
         self.last_command_time = None
         self.min_command_interval = 5  # Seconds between commands
         
+        # Short-lived status cache so frequent polling doesn't flood the device
+        self._status_cache = None
+        self._status_cache_ts = 0.0
+        self._status_ttl = status_ttl
+        
         logger.info(f"Tuya mini-split initialized at {ip_address}")
     
     def set_temperature(self, temp_f: float, mode: str = 'cool') -> bool:
@@ -57,12 +76,13 @@ class TuyaMiniSplitController:
             bool: True if command sent successfully
         """
         # Validate temperature range
-        if not 60 <= temp_f <= 75:
-            logger.error(f"Temperature {temp_f}°F outside safe range (60-75°F)")
+        if not self._TEMP_MIN_F <= temp_f <= self._TEMP_MAX_F:
+            logger.error(f"Temperature {temp_f}°F outside safe range "
+                         f"({self._TEMP_MIN_F}-{self._TEMP_MAX_F}°F)")
             return False
         
         # Rate limiting
-        current_time = time.time()
+        current_time = time.monotonic()
         if self.last_command_time:
             elapsed = current_time - self.last_command_time
             if elapsed < self.min_command_interval:
@@ -71,30 +91,33 @@ class TuyaMiniSplitController:
         
         try:
             # Convert temperature (68.0°F → 680)
-            temp_value = int(temp_f * self.temp_scale)
+            temp_value = int(temp_f * self._TEMP_SCALE)
             
             # Map mode to Tuya protocol
-            mode_map = {
-                'cool': 'cold',
-                'heat': 'hot',
-                'dry': 'wet',
-                'fan': 'wind',
-                'auto': 'auto'
-            }
-            tuya_mode = mode_map.get(mode.lower(), 'cold')
+            tuya_mode = self._MODE_MAP.get(mode.lower(), 'cold')
             
             logger.info(f"Setting mini-split: {temp_f}°F, mode={tuya_mode}")
             
-            # Send commands with delays for reliability
-            self.device.set_value(self.DP_POWER, True)
-            time.sleep(0.3)
-            
-            self.device.set_value(self.DP_TEMP_SET_F, temp_value)
-            time.sleep(0.3)
-            
-            self.device.set_value(self.DP_MODE, tuya_mode)
+            # Send power, setpoint and mode in a single command frame
+            try:
+                self.device.set_multiple_values({
+                    self.DP_POWER: True,
+                    self.DP_TEMP_SET_F: temp_value,
+                    self.DP_MODE: tuya_mode
+                })
+            except Exception as e:
+                # Older firmware may reject multi-DP writes - send one at a time
+                logger.warning(f"Batched DP write failed ({e}), sending sequentially")
+                self.device.set_value(self.DP_POWER, True)
+                time.sleep(0.3)
+                
+                self.device.set_value(self.DP_TEMP_SET_F, temp_value)
+                time.sleep(0.3)
+                
+                self.device.set_value(self.DP_MODE, tuya_mode)
             
             self.last_command_time = current_time
+            self._status_cache = None
             logger.info(f"✓ Mini-split command sent successfully")
             return True
             
@@ -109,6 +132,10 @@ class TuyaMiniSplitController:
         Returns:
             Dict with status info, or None if failed
         """
+        now = time.monotonic()
+        if self._status_cache is not None and now - self._status_cache_ts < self._status_ttl:
+            return dict(self._status_cache)
+        
         try:
             data = self.device.status()
             
@@ -127,13 +154,15 @@ class TuyaMiniSplitController:
             # Convert setpoint (680 → 68.0°F)
             temp_setpoint = temp_set_raw / self.temp_scale
             
-            return {
+            self._status_cache = {
                 'power': power,
                 'setpoint_f': temp_setpoint,
                 'current_temp_f': temp_current,
                 'mode': mode,
                 'connected': True
             }
+            self._status_cache_ts = now
+            return dict(self._status_cache)
             
         except Exception as e:
             logger.error(f"Failed to get mini-split status: {e}")
@@ -143,6 +172,7 @@ class TuyaMiniSplitController:
         """Turn mini-split on"""
         try:
             self.device.set_value(self.DP_POWER, True)
+            self._status_cache = None
             logger.info("Mini-split powered ON")
             return True
         except Exception as e:
@@ -153,6 +183,7 @@ class TuyaMiniSplitController:
         """Turn mini-split off"""
         try:
             self.device.set_value(self.DP_POWER, False)
+            self._status_cache = None
             logger.info("Mini-split powered OFF")
             return True
         except Exception as e:
@@ -6,6 +6,7 @@ Precision drying with gradual stepping for optimal terpene retention
 
 import time
 import json
+import asyncio
 import logging
 import threading
 import numpy as np
@@ -15,6 +16,8 @@ from typing import Dict, List, Optional, Tuple
 from enum import Enum
 from collections import deque
 
+from software.control.vpd_math import compute_vpd
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +25,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Numba is optional - without it the simulation kernel runs as plain Python
+NUMBA_AVAILABLE = False
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 # MOVE DryingPhase HERE - BEFORE it's used in VPDSetpoint
 class DryingPhase(Enum):
     """Drying phase enumeration with precise timing"""
@@ -53,6 +67,19 @@ class VPDSetpoint:
     vpd_max: float
     hours_in_phase: int
 
+# One row per sensor sample in the controller's reading history
+READING_DTYPE = np.dtype([
+    ('t', 'f4'),       # °F
+    ('rh', 'f4'),      # %RH
+    ('dp', 'f4'),      # Dew point °F
+    ('vpd', 'f4'),     # kPa
+    ('svp', 'f4'),     # kPa
+    ('avp', 'f4'),     # kPa
+    ('aw', 'f4'),      # Estimated water activity
+    ('ts', 'i8'),      # Epoch milliseconds
+    ('sensor', 'u1'),  # Index into PrecisionVPDController.ring_sensor_ids
+])
+
 @dataclass
 class SensorReading:
     """Sensor data structure"""
@@ -128,7 +155,7 @@ class ControlSetpoint:
 class PrecisionVPDController:
     """Precision VPD-based control system mimicking Cannatrol approach"""
     
-    def __init__(self):
+    def __init__(self, ring_capacity: int = 200_000):
         self.current_phase = DryingPhase.DRY_INITIAL
         self.phase_start_time = datetime.now()
         self.sensor_readings: Dict[str, SensorReading] = {}
@@ -235,6 +262,18 @@ class PrecisionVPDController:
         self.estimated_water_activity = 0.85  # Starting estimate
         self.target_water_activity = 0.61     # Target 0.60-0.62
         
+        # Reading history ring buffer (about a week at 8 sensors every 30 s)
+        self.ring_capacity = ring_capacity
+        self._ring = np.zeros(ring_capacity, dtype=READING_DTYPE)
+        self._ring_head = 0
+        self._ring_count = 0
+        self.ring_sensor_ids: List[str] = []
+        self._ring_sensor_idx: Dict[str, int] = {}
+        
+        # Set on every new reading once an event loop is attached
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._new_reading: Optional[asyncio.Event] = None
+        
     def update_sensor_reading(self, sensor_id: str, temperature: float, humidity: float):
         """Update sensor reading"""
         self.sensor_readings[sensor_id] = SensorReading(
@@ -243,9 +282,138 @@ class PrecisionVPDController:
             timestamp=datetime.now(),
             sensor_id=sensor_id
         )
-        logger.debug(f"Sensor {sensor_id}: {temperature:.1f}°F, {humidity:.1f}%RH, "
-                    f"DP: {self.sensor_readings[sensor_id].dew_point:.1f}°F, "
-                    f"VPD: {self.sensor_readings[sensor_id].vpd_kpa:.2f}kPa")
+        self._append_readings([sensor_id], np.array([temperature]), np.array([humidity]))
+        if logger.isEnabledFor(logging.DEBUG):
+            reading = self.sensor_readings[sensor_id]
+            logger.debug("Sensor %s: %.1f°F, %.1f%%RH, DP: %.1f°F, VPD: %.2fkPa",
+                         sensor_id, temperature, humidity,
+                         reading.dew_point, reading.vpd_kpa)
+    
+    def update_sensor_readings_batch(self, sensor_ids: List[str], temperatures: np.ndarray,
+                                     humidities: np.ndarray):
+        """Update several sensor readings in one call with a shared timestamp"""
+        now = datetime.now()
+        self.sensor_readings.update(
+            (sensor_id, SensorReading(
+                temperature=temperature,
+                humidity=humidity,
+                timestamp=now,
+                sensor_id=sensor_id
+            ))
+            for sensor_id, temperature, humidity in zip(
+                sensor_ids, temperatures.tolist(), humidities.tolist()
+            )
+        )
+        self._append_readings(sensor_ids, temperatures, humidities, now)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Updated %d sensors: %.1f°F, %.1f%%RH avg",
+                         len(sensor_ids), temperatures.mean(), humidities.mean())
+    
+    def ingest_sensor_readings(self, readings: Dict[str, dict]):
+        """Apply a SensorManager.read_all_sensors() result as one batch"""
+        ok = [(sensor_id, reading['temperature'], reading['humidity'])
+              for sensor_id, reading in readings.items()
+              if reading and reading.get('status') == 'ok']
+        if not ok:
+            return
+        sensor_ids, temperatures, humidities = zip(*ok)
+        self.update_sensor_readings_batch(list(sensor_ids), np.array(temperatures),
+                                          np.array(humidities))
+    
+    def _append_readings(self, sensor_ids: List[str], temperatures: np.ndarray,
+                         humidities: np.ndarray, timestamp: Optional[datetime] = None):
+        """Write derived values for a batch of samples into the ring buffer"""
+        n = len(sensor_ids)
+        if n == 0:
+            return
+        t = np.asarray(temperatures, dtype=np.float64)
+        rh = np.asarray(humidities, dtype=np.float64)
+        t_c = (t - 32) * 5/9
+        # Same Tetens constants as compute_vpd so vpd == svp - avp per row
+        svp = 0.61078 * np.exp((17.269 * t_c) / (t_c + 237.3))
+        avp = svp * (rh / 100)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            alpha = ((17.27 * t_c) / (237.7 + t_c)) + np.log(rh / 100.0)
+            dew_c = (237.7 * alpha) / (17.27 - alpha)
+        
+        rows = np.empty(n, dtype=READING_DTYPE)
+        rows['t'] = t
+        rows['rh'] = rh
+        rows['dp'] = dew_c * 9/5 + 32
+        rows['vpd'] = compute_vpd(t_c, rh)
+        rows['svp'] = svp
+        rows['avp'] = avp
+        rows['aw'] = rh / 100
+        rows['ts'] = int((timestamp or datetime.now()).timestamp() * 1000)
+        rows['sensor'] = [self._ring_sensor_index(sensor_id) for sensor_id in sensor_ids]
+        
+        # Keep only the newest rows if the batch is larger than the buffer
+        if n > self.ring_capacity:
+            rows = rows[-self.ring_capacity:]
+            n = self.ring_capacity
+        end = self._ring_head + n
+        if end <= self.ring_capacity:
+            self._ring[self._ring_head:end] = rows
+        else:
+            split = self.ring_capacity - self._ring_head
+            self._ring[self._ring_head:] = rows[:split]
+            self._ring[:n - split] = rows[split:]
+        self._ring_head = end % self.ring_capacity
+        self._ring_count = min(self._ring_count + n, self.ring_capacity)
+        self._notify_new_reading()
+    
+    def attach_event_loop(self, loop: asyncio.AbstractEventLoop) -> asyncio.Event:
+        """Create the event set whenever readings arrive, bound to loop"""
+        self._event_loop = loop
+        self._new_reading = asyncio.Event()
+        return self._new_reading
+    
+    def _notify_new_reading(self):
+        """Wake anything awaiting _new_reading, from any thread"""
+        if self._new_reading is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._event_loop:
+            self._new_reading.set()
+        else:
+            try:
+                self._event_loop.call_soon_threadsafe(self._new_reading.set)
+            except RuntimeError:
+                pass  # Loop already closed (shutting down)
+    
+    def _ring_sensor_index(self, sensor_id: str) -> int:
+        """Map a sensor id to its small integer code in the ring buffer"""
+        idx = self._ring_sensor_idx.get(sensor_id)
+        if idx is None:
+            idx = len(self.ring_sensor_ids)
+            self._ring_sensor_idx[sensor_id] = idx
+            self.ring_sensor_ids.append(sensor_id)
+        return idx
+    
+    def get_reading_history(self, last_n: Optional[int] = None,
+                            sensor_id: Optional[str] = None) -> np.ndarray:
+        """Return buffered readings oldest-first as a structured array
+        
+        last_n counts rows for sensor_id when one is given. The result is a
+        view into the ring buffer when the requested rows are contiguous and
+        a copy when they wrap around or are filtered by sensor.
+        """
+        if sensor_id is not None:
+            idx = self._ring_sensor_idx.get(sensor_id)
+            history = self.get_reading_history()
+            if idx is None:
+                return history[:0]
+            history = history[history['sensor'] == idx]
+            return history if last_n is None else history[len(history) - min(last_n, len(history)):]
+        
+        count = self._ring_count if last_n is None else min(last_n, self._ring_count)
+        start = self._ring_head - count
+        if start >= 0:
+            return self._ring[start:self._ring_head]
+        return np.concatenate((self._ring[start:], self._ring[:self._ring_head]))
     
     def get_dry_room_conditions(self) -> Tuple[float, float, float, float]:
         """Get average conditions from drying room sensors only"""
@@ -721,14 +889,7 @@ class PrecisionVPDController:
             try:
                 # Read sensors and update readings FIRST!
                 if self.hardware_mode and self.sensor_manager:
-                    readings = self.sensor_manager.read_all_sensors()
-                    for sensor_id, reading in readings.items():
-                        if reading and reading.get('status') == 'ok':
-                            self.update_sensor_reading(
-                                sensor_id,
-                                reading['temperature'],
-                                reading['humidity']
-                            )
+                    self.ingest_sensor_readings(self.sensor_manager.read_all_sensors())
                 
                 # THEN calculate control action
                 new_states = self.calculate_control_action()
@@ -801,9 +962,64 @@ class PrecisionVPDController:
         }
 
 # Simulation mode for testing without hardware
+@njit(cache=True, fastmath=True)
+def _sim_step(room_temp, room_humidity, supply_temp, supply_humidity, setpoint,
+              mini_split_on, dehum_on, hum_on, erv_on, temps, humidities):
+    """Advance the simulated room one tick and fill per-sensor readings
+    
+    temps/humidities are filled in SimulationMode.SENSOR_IDS order.
+    Returns the new (room_temp, room_humidity, supply_temp, supply_humidity).
+    """
+    # Temperature effects
+    if mini_split_on:
+        # Mini-split gradually moves temp toward setpoint
+        room_temp -= (room_temp - setpoint) * 0.02  # Slow convergence
+    
+    # Humidity effects
+    if dehum_on:
+        room_humidity -= np.random.uniform(0.1, 0.3)
+        room_temp += np.random.uniform(0.01, 0.05)  # Dehum adds slight heat
+    
+    if hum_on:
+        room_humidity += np.random.uniform(0.2, 0.4)
+        room_temp -= np.random.uniform(0.01, 0.03)  # Evaporative cooling
+    
+    # ERV effects (fresh air exchange)
+    if erv_on:
+        # Pulls conditions slightly toward ambient (assumed 70°F, 50% RH)
+        room_temp += (70 - room_temp) * 0.005
+        room_humidity += (50 - room_humidity) * 0.005
+    
+    # Natural drift and variation
+    room_temp += np.random.uniform(-0.1, 0.1)
+    room_humidity += np.random.uniform(-0.2, 0.2)
+    
+    # Keep within reasonable bounds
+    room_temp = max(60.0, min(80.0, room_temp))
+    room_humidity = max(35.0, min(75.0, room_humidity))
+    
+    # Dry room sensors with slight variations
+    for i in range(4):
+        temps[i] = room_temp + np.random.uniform(-1, 1)
+        humidities[i] = room_humidity + np.random.uniform(-2, 2)
+    
+    # Air room sensor (equipment room)
+    temps[4] = room_temp + np.random.uniform(-0.5, 0.5)
+    humidities[4] = room_humidity + np.random.uniform(-1, 1)
+    
+    # Supply duct sensor (conditioned air)
+    supply_temp = 0.8 * supply_temp + 0.2 * room_temp
+    supply_humidity = 0.8 * supply_humidity + 0.2 * room_humidity
+    temps[5] = supply_temp + np.random.uniform(-0.5, 0.5)
+    humidities[5] = supply_humidity + np.random.uniform(-1, 1)
+    
+    return room_temp, room_humidity, supply_temp, supply_humidity
+
 class SimulationMode:
     """Simulate sensor readings and environmental response"""
     
+    SENSOR_IDS = ['dry_1', 'dry_2', 'dry_3', 'dry_4', 'air_room', 'supply_duct']
+    
     def __init__(self, controller: PrecisionVPDController):
         self.controller = controller
         # Start with typical initial conditions
@@ -811,63 +1027,27 @@ class SimulationMode:
         self.room_humidity = 63.0
         self.supply_temp = 68.0
         self.supply_humidity = 60.0
+        # Per-sensor output buffers reused every tick
+        self.temps = np.zeros(len(self.SENSOR_IDS))
+        self.humidities = np.zeros(len(self.SENSOR_IDS))
         
     def generate_readings(self):
         """Generate simulated sensor readings with realistic responses"""
-        import random
-        
         # Simulate equipment effects on environment
         equipment = self.controller.equipment_states
         
-        # Temperature effects
-        if equipment['mini_split'] == EquipmentState.ON:
-            # Mini-split gradually moves temp toward setpoint
-            temp_error = self.room_temp - self.controller.mini_split_setpoint
-            self.room_temp -= temp_error * 0.02  # Slow convergence
-        
-        # Humidity effects
-        if equipment['dehum'] == EquipmentState.ON:
-            self.room_humidity -= random.uniform(0.1, 0.3)
-            self.room_temp += random.uniform(0.01, 0.05)  # Dehum adds slight heat
-            
-        if equipment['hum_solenoid'] == EquipmentState.ON:
-            self.room_humidity += random.uniform(0.2, 0.4)
-            self.room_temp -= random.uniform(0.01, 0.03)  # Evaporative cooling
-        
-        # ERV effects (fresh air exchange)
-        if equipment['erv'] == EquipmentState.ON:
-            # Pulls conditions slightly toward ambient (assumed 70°F, 50% RH)
-            self.room_temp += (70 - self.room_temp) * 0.005
-            self.room_humidity += (50 - self.room_humidity) * 0.005
-        
-        # Natural drift and variation
-        self.room_temp += random.uniform(-0.1, 0.1)
-        self.room_humidity += random.uniform(-0.2, 0.2)
-        
-        # Keep within reasonable bounds
-        self.room_temp = max(60, min(80, self.room_temp))
-        self.room_humidity = max(35, min(75, self.room_humidity))
-        
-        # Update dry room sensors with slight variations
-        for i in range(1, 5):
-            self.controller.update_sensor_reading(
-                f'dry_{i}',
-                self.room_temp + random.uniform(-1, 1),
-                self.room_humidity + random.uniform(-2, 2)
-            )
-        
-        # Air room sensor (equipment room)
-        self.controller.update_sensor_reading(
-            'air_room',
-            self.room_temp + random.uniform(-0.5, 0.5),
-            self.room_humidity + random.uniform(-1, 1)
+        (self.room_temp, self.room_humidity,
+         self.supply_temp, self.supply_humidity) = _sim_step(
+            self.room_temp, self.room_humidity,
+            self.supply_temp, self.supply_humidity,
+            float(self.controller.mini_split_setpoint),
+            equipment['mini_split'] == EquipmentState.ON,
+            equipment['dehum'] == EquipmentState.ON,
+            equipment['hum_solenoid'] == EquipmentState.ON,
+            equipment['erv'] == EquipmentState.ON,
+            self.temps, self.humidities
         )
         
-        # Supply duct sensor (conditioned air)
-        self.supply_temp = 0.8 * self.supply_temp + 0.2 * self.room_temp
-        self.supply_humidity = 0.8 * self.supply_humidity + 0.2 * self.room_humidity
-        self.controller.update_sensor_reading(
-            'supply_duct',
-            self.supply_temp + random.uniform(-0.5, 0.5),
-            self.supply_humidity + random.uniform(-1, 1)
+        self.controller.update_sensor_readings_batch(
+            self.SENSOR_IDS, self.temps, self.humidities
         )
\ No newline at end of file
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Array VPD kernel used for the controller's per-scan ring buffer rows
+(PrecisionVPDController._append_readings) and by hardware/pi/test_hardware.py
+"""
+
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Numba is optional - without it the kernel below runs as a NumPy expression
+NUMBA_AVAILABLE = False
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    logger.warning("numba not available - compute_vpd will use NumPy")
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def compute_vpd(temp_c, rh):
+        """VPD (kPa) for arrays of air temperature (°C) and RH (%)"""
+        out = np.empty_like(temp_c)
+        for i in range(temp_c.size):
+            svp = 0.61078 * math.exp((17.269 * temp_c[i]) / (237.3 + temp_c[i]))
+            out[i] = svp - svp * (rh[i] / 100.0)
+        return out
+else:
+    def compute_vpd(temp_c, rh):
+        """VPD (kPa) for arrays of air temperature (°C) and RH (%)"""
+        svp = 0.61078 * np.exp((17.269 * temp_c) / (237.3 + temp_c))
+        return svp - svp * (rh / 100.0)
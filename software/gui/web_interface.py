@@ -126,7 +126,8 @@ class WebMonitoringService:
         avg_humidity = sum(zone["humidity"] for zone in drying_zones) / len(drying_zones)
         
         # Get VPD calculation
-        vpd_reading = self.controller.vpd_calc.calculate_vpd_from_conditions(avg_temp, avg_humidity)
+        now = datetime.now()
+        vpd_reading = self.controller.vpd_calc.calculate_vpd_from_conditions(avg_temp, avg_humidity, now)
         
         # Get current phase if process is running
         current_phase = DryingPhase.INITIAL_MOISTURE_REMOVAL
@@ -134,12 +135,13 @@ class WebMonitoringService:
         time_remaining = "Not started"
         
         if process_start_time:
-            current_phase = self.controller.vpd_calc.get_current_phase_from_elapsed_time(process_start_time)
-            phase_progress = self.controller.vpd_calc.calculate_phase_progress(process_start_time, current_phase)
+            vpd_calc = self.controller.vpd_calc
+            elapsed_hours = vpd_calc.elapsed_hours(process_start_time)
+            current_phase = vpd_calc.get_phase_for_elapsed_hours(elapsed_hours)
+            phase_progress = vpd_calc.calculate_phase_progress_for_elapsed_hours(elapsed_hours, current_phase)
             
             # Calculate time remaining
-            total_duration = sum(profile.duration_hours for profile in self.controller.vpd_calc.step_profiles.values())
-            elapsed_hours = (datetime.now() - process_start_time).total_seconds() / 3600
+            total_duration = sum(profile.duration_hours for profile in vpd_calc.step_profiles.values())
             remaining_hours = max(0, total_duration - elapsed_hours)
             time_remaining = f"{remaining_hours:.1f} hours"
         
@@ -147,7 +149,7 @@ class WebMonitoringService:
         target_temp, target_dew, target_rh = self.controller.vpd_calc.get_phase_target_conditions(current_phase, phase_progress)
         
         return {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "system_active": process_start_time is not None,
             "process_start_time": process_start_time.isoformat() if process_start_time else None,
             "session_id": self.current_session_id,
@@ -220,7 +222,7 @@ class WebMonitoringService:
         try:
             # Generate session ID
             self.current_session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            process_start_time = datetime.now()
+            process_start_time = self.controller.vpd_calc.start_process()
             
             # Start data logging
             initial_conditions = {